@@ -1,20 +1,35 @@
+import logging
+import os
 import time
+from concurrent.futures import Future
 from datetime import datetime, timezone
+from typing import Any, Callable
 from zoneinfo import ZoneInfo
-from io import BytesIO
-from unicodedata import normalize
 
 import streamlit as st
 from dotenv import load_dotenv
 
-from core.crud import (find_enrollment_by_token_and_semester,
-                       find_student_by_matricula, get_configuracoes,
-                       get_turmas, save_enrollment)
-from core.database import get_database, get_db_connection
-from utils.enem import (extract_hash_from_pdf, fetch_enem_scores,
-                        parse_relevant_scores)
+from core.cache import (cache_stats, get_configuracoes_cached,
+                        get_turmas_cached)
+from core.crud import (AmbiguousCalouroError, find_calouro_by_name,
+                       find_student_by_matricula, has_calouros_list,
+                       save_enrollment)
+from core.crud_async import find_enem_and_enrollment
+from core.database import (get_async_db_connection, get_database,
+                           get_db_connection, pool_stats)
+from core.enem_cache import enem_cache_stats
+from core.occupancy import TurmaFullError, get_occupancy_cached
+from utils.aio import submit
+from utils.enem import inep_stats
+from utils.inep_client import (InepRateLimitedError, InepTimeoutError,
+                               InepUnavailableError)
+from utils.metrics import (configure, logger, register_gauges,
+                           start_metrics_server, track)
+from utils.names import normalize_name
+from utils.pdf_sandbox import PdfSandboxError, get_pdf_sandbox
+from utils.session import EnemSession, session_stats
 from utils.generate_pdf import generate_pdf
-from utils.style import load_css, load_image_as_base64
+from utils.style import image_src, load_css
 
 
 try:
@@ -25,6 +40,38 @@ except Exception:
     LOCAL_TZ = timezone(timedelta(hours=-3))
 
 
+@st.cache_resource
+def setup_metrics():
+    """
+    Configura a instrumentação uma vez por processo a partir de
+    METRICS_ENABLED, METRICS_LOG_JSON e METRICS_PORT.
+    """
+    enabled = os.getenv('METRICS_ENABLED', '').lower() in ('1', 'true')
+    log_json = os.getenv('METRICS_LOG_JSON', '').lower() in ('1', 'true')
+    configure(enabled, log_json=log_json)
+    if log_json:
+        logger.addHandler(logging.StreamHandler())
+        logger.setLevel(logging.INFO)
+    register_gauges('config_cache', cache_stats)
+    register_gauges('enem_cache', enem_cache_stats)
+    register_gauges('inep', inep_stats)
+    register_gauges('pdf_sandbox', lambda: get_pdf_sandbox().stats())
+    register_gauges('sessions', session_stats)
+    register_gauges('mongo_pool', pool_stats)
+    port = os.getenv('METRICS_PORT')
+    if enabled and port:
+        start_metrics_server(int(port))
+
+
+def wait_for(future: Future, on_tick: Callable[[], Any]) -> Any:
+    """Espera o resultado de `future`, chamando `on_tick` a cada meio segundo."""
+    while True:
+        try:
+            return future.result(timeout=0.5)
+        except TimeoutError:
+            on_tick()
+
+
 def display_status_page(title: str, message: str, date: datetime):
     """Função genérica para exibir página de status."""
     st.title(title)
@@ -37,32 +84,21 @@ def display_status_page(title: str, message: str, date: datetime):
     st.stop()
 
 
-def verify_names_match(name1: str, name2: str) -> bool:
-    def normalize_name(name: str) -> str:
-        name = (
-            normalize('NFKD', name).encode('ASCII', 'ignore').decode('utf-8')
-        )
-        return ''.join(name.lower().split())
-
-    return normalize_name(name1) == normalize_name(name2)
-
-
 def initialize_session_state():
     if 'step' not in st.session_state:
         st.session_state.step = 'identificacao'
         st.session_state.matricula = ''
         st.session_state.aluno_data = None
-        st.session_state.enem_data = None
-        st.session_state.existing_enrollment = None
+        st.session_state.enem = None
         st.session_state.is_update = False
         st.session_state.info_message = ''
 
 
 def display_logo():
-    logo_base64 = load_image_as_base64('logo.png')
-    if logo_base64:
+    logo_src = image_src('logo.png')
+    if logo_src:
         st.markdown(
-            f'<div class="logo-container"><img src="data:image/png;base64,{logo_base64}" class="logo-img"></div>',
+            f'<div class="logo-container"><img src="{logo_src}" class="logo-img"></div>',
             unsafe_allow_html=True,
         )
 
@@ -114,7 +150,7 @@ def handle_identificacao_step(db):
                     )
 
 
-def handle_validacao_enem_step(db, config):
+def handle_validacao_enem_step(db, adb, config):
     if st.session_state.info_message:
         st.info(st.session_state.info_message)
         st.session_state.info_message = ''
@@ -141,11 +177,20 @@ def handle_validacao_enem_step(db, config):
         )
         if enem_pdf:
             with st.spinner('Analisando o PDF...'):
-                hash_token = extract_hash_from_pdf(BytesIO(enem_pdf.read()))
-                if hash_token:
-                    st.success('Token extraído com sucesso do PDF!')
+                try:
+                    hash_token = get_pdf_sandbox().extract_hash(
+                        enem_pdf.getvalue()
+                    )
+                except PdfSandboxError:
+                    hash_token = None
+                    st.error(
+                        'Não foi possível analisar este PDF. Envie o PDF oficial do ENEM ou insira o token manualmente.'
+                    )
                 else:
-                    st.error('Token não encontrado no PDF.')
+                    if hash_token:
+                        st.success('Token extraído com sucesso do PDF!')
+                    else:
+                        st.error('Token não encontrado no PDF.')
     with tab2:
         st.subheader('Opção 2: Inserir o Token Manualmente')
         with st.expander('Clique para ver as instruções'):
@@ -167,33 +212,98 @@ def handle_validacao_enem_step(db, config):
                 'Por favor, anexe um PDF válido ou insira o token para continuar.'
             )
             return
+        queue_status = st.empty()
+        queue = {}
+
+        def show_queue(position: int, eta: float):
+            queue_status.info(
+                f'Muitos alunos consultando o INEP agora. Você é o {position + 1}º da fila; espera estimada de {eta:.0f}s.'
+            )
+
         with st.spinner(
             'Consultando a API do INEP e verificando inscrição...'
         ):
-            enem_data = fetch_enem_scores(hash_token)
+            try:
+                # O INEP e a inscrição anterior são consultados em paralelo
+                # no loop async; a fila do INEP é redesenhada daqui.
+                lookup = submit(
+                    find_enem_and_enrollment(
+                        adb,
+                        hash_token,
+                        config.get('activeSemester', 'N/A'),
+                        use_cache=st.secrets.get('ENEM_CACHE_ENABLED', True),
+                        on_wait=lambda position, eta: queue.update(
+                            position=position, eta=eta
+                        ),
+                    )
+                )
+                enem_data, existing_enrollment = wait_for(
+                    lookup, lambda: queue and show_queue(**queue)
+                )
+            except InepRateLimitedError as e:
+                queue_status.empty()
+                st.warning(
+                    f'Há muitos alunos consultando o INEP neste momento. Por favor, tente novamente em cerca de {max(e.retry_after, 5):.0f} segundos.'
+                )
+                return
+            except InepTimeoutError:
+                queue_status.empty()
+                st.error(
+                    'O serviço do INEP não respondeu a tempo. Por favor, tente novamente em alguns instantes.'
+                )
+                return
+            except InepUnavailableError:
+                queue_status.empty()
+                st.error(
+                    'O serviço do INEP está fora do ar no momento. Por favor, volte e tente novamente em alguns minutos.'
+                )
+                return
+            queue_status.empty()
             if not enem_data:
                 st.error(
-                    'Falha ao validar suas notas. O serviço do INEP pode estar instável ou o token é inválido.'
+                    'O INEP não reconheceu este token. Confira a chave de validação do seu boletim do ENEM.'
                 )
                 return
-            existing_enrollment = find_enrollment_by_token_and_semester(
-                db, enem_data.get('hash'), config.get('activeSemester', 'N/A')
-            )
             if existing_enrollment:
-                st.session_state.is_update = True
-                st.session_state.existing_enrollment = existing_enrollment
                 st.session_state.info_message = 'Encontramos sua inscrição anterior. Você pode revisar e alterar suas escolhas abaixo.'
-            nome_sigaa = st.session_state.aluno_data.get('Nome')
+            aluno_data = st.session_state.aluno_data
+            nome_sigaa = aluno_data.get('Nome')
             nome_enem = enem_data.get('nome', '')
+            chave_enem = normalize_name(nome_enem)
             if st.session_state.is_calouro:
-                st.session_state.aluno_data['Nome'] = nome_enem
-                st.session_state.aluno_data['Curso'] = 'A ser confirmado'
-            elif not verify_names_match(nome_sigaa, nome_enem):
+                try:
+                    calouro = find_calouro_by_name(
+                        db, chave_enem, aluno_data.get('Matricula')
+                    )
+                except AmbiguousCalouroError:
+                    st.error(
+                        f"Há mais de um ingressante chamado '{nome_enem}' na lista deste período. Procure a coordenação para concluir sua inscrição."
+                    )
+                    return
+                if calouro:
+                    aluno_data['Nome'] = nome_enem
+                    aluno_data['Curso'] = calouro.get('Curso')
+                    aluno_data['Centro'] = calouro.get('Centro')
+                elif has_calouros_list(db):
+                    st.error(
+                        f"O nome no ENEM ('{nome_enem}') não consta na lista de ingressantes deste período. Verifique sua matrícula e o pdf/token inserido."
+                    )
+                    return
+                else:
+                    aluno_data['Nome'] = nome_enem
+                    aluno_data['Curso'] = 'A ser confirmado'
+            elif (
+                aluno_data.get('nome_normalizado')
+                or normalize_name(nome_sigaa)
+            ) != chave_enem:
                 st.error(
                     f"O nome no ENEM ('{nome_enem}') não corresponde ao da matrícula ('{nome_sigaa}'). Verifique o pdf/token inserido e tente novamente."
                 )
                 return
-            st.session_state.enem_data = enem_data
+            # Só o necessário para a confirmação fica na sessão.
+            enem = EnemSession.from_validation(enem_data, existing_enrollment)
+            st.session_state.enem = enem
+            st.session_state.is_update = enem.is_update
             st.session_state.step = 'confirmacao'
             st.success('Notas validadas com sucesso!')
             time.sleep(1.5)
@@ -208,8 +318,8 @@ def handle_confirmacao_step(db, config):
     with st.form('form_final'):
         st.header('Passo 3: Escolha e Confirmação')
         aluno_info = st.session_state.aluno_data
-        enem_info = st.session_state.enem_data
-        relevant_scores = parse_relevant_scores(enem_info) if enem_info else {}
+        enem = st.session_state.enem
+        relevant_scores = enem.scores if enem else {}
         st.write(f"**Nome:** {aluno_info.get('Nome', 'N/A')}")
         st.write(f"**Matrícula:** {aluno_info.get('Matricula', 'N/A')}")
         st.write(f"**Curso:** {aluno_info.get('Curso', 'A ser confirmado')}")
@@ -221,14 +331,15 @@ def handle_confirmacao_step(db, config):
             st.caption(
                 f"Baseada na Redação ({relevant_scores.get('nota_redacao', 'N/A')}) e Linguagens ({relevant_scores.get('nota_linguagens', 'N/A')})."
             )
-        turmas_disponiveis = get_turmas(
-            db, config.get('activeSemester', 'N/A')
-        )
+        semester = config.get('activeSemester', 'N/A')
+        turmas_disponiveis = get_turmas_cached(db, semester)
+        occupancy = get_occupancy_cached(db, semester)
+        enforce_capacity = config.get('enforceCapacity', False)
         if not turmas_disponiveis:
             turmas_disponiveis = ['Turmas não disponíveis']
         previous_turma = (
-            st.session_state.existing_enrollment.get('turma_escolhida')
-            if st.session_state.existing_enrollment
+            enem.turma_anterior
+            if enem and enem.is_update
             else turmas_disponiveis[0]
         )
         turma_selecionada = st.selectbox(
@@ -237,6 +348,9 @@ def handle_confirmacao_step(db, config):
             index=turmas_disponiveis.index(previous_turma)
             if previous_turma in turmas_disponiveis
             else 0,
+            format_func=lambda turma: turma_label(
+                turma, occupancy.get(turma), enforce_capacity
+            ),
         )
         escolha_options = ['Cursar disciplina', 'Dispensa de disciplina']
         nota_minima_dispensa = config.get('cutoffScore', 6.75)
@@ -246,8 +360,8 @@ def handle_confirmacao_step(db, config):
                 f"Sua nota é inferior a {nota_minima_dispensa}, portanto apenas a opção 'Cursar disciplina' está disponível."
             )
         previous_escolha = (
-            st.session_state.existing_enrollment.get('escolha')
-            if st.session_state.existing_enrollment
+            enem.escolha_anterior
+            if enem and enem.is_update
             else escolha_options[0]
         )
         escolha_selecionada = st.selectbox(
@@ -271,12 +385,14 @@ def handle_confirmacao_step(db, config):
                 final_enrollment_data = {
                     **aluno_info,
                     'turma_escolhida': turma_selecionada,
-                    'token_enem': enem_info.get('hash'),
+                    'token_enem': enem.token,
                     'notas_relevantes': relevant_scores,
                     'escolha': escolha_selecionada,
-                    'semester': config.get('activeSemester', 'N/A'),
+                    'semester': semester,
                 }
-                save_enrollment(db, final_enrollment_data)
+                save_enrollment(
+                    db, final_enrollment_data, enforce_capacity
+                )
                 st.session_state.final_data = {
                     **final_enrollment_data,
                     'is_update': st.session_state.is_update,
@@ -284,12 +400,36 @@ def handle_confirmacao_step(db, config):
                 }
                 st.session_state.step = 'finalizado'
                 st.rerun()
+            except TurmaFullError as e:
+                st.error(
+                    f"A turma '{e.turma}' atingiu o limite de vagas. "
+                    'Selecione outra turma.'
+                )
             except Exception as e:
                 st.error(
                     f'Ocorreu um erro interno ao salvar. Tente novamente. Erro: {e}'
                 )
 
 
+def turma_label(
+    turma: str, counts: dict[str, Any] | None, enforce_capacity: bool
+) -> str:
+    """Nome da turma com os inscritos, para o seletor da confirmação."""
+    if not counts:
+        return turma
+    label = (
+        f"{turma} — {counts['total']} inscritos "
+        f"({counts['cursar']} cursar, {counts['dispensa']} dispensa)"
+    )
+    capacity = counts['capacity']
+    if capacity is None:
+        return label
+    label = f'{label}, {capacity} vagas'
+    if enforce_capacity and counts['cursar'] >= capacity:
+        label = f'{label} — lotada'
+    return label
+
+
 def handle_finalizado_step():
     st.balloons()
     st.title('Inscrição Realizada com Sucesso!')
@@ -318,19 +458,21 @@ def main():
         page_title='Inscrição | DLPL', page_icon='📝', layout='centered'
     )
     load_dotenv()
+    setup_metrics()
     load_css()
     client = get_db_connection()
     db = get_database(client)
+    adb = get_database(get_async_db_connection())
 
     display_logo()
 
-    if db is None:
+    if db is None or adb is None:
         st.error(
             'Falha na conexão com o banco de dados. O sistema está indisponível.'
         )
         st.stop()
 
-    config = get_configuracoes(db)
+    config = get_configuracoes_cached(db)
     if not config:
         st.error(
             'Não foi possível carregar as configurações do sistema. Tente novamente mais tarde.'
@@ -372,13 +514,16 @@ def main():
 
     steps = {
         'identificacao': lambda: handle_identificacao_step(db),
-        'validacao_enem': lambda: handle_validacao_enem_step(db, config),
+        'validacao_enem': lambda: handle_validacao_enem_step(
+            db, adb, config
+        ),
         'confirmacao': lambda: handle_confirmacao_step(db, config),
         'finalizado': handle_finalizado_step,
     }
     step_function = steps.get(st.session_state.step)
     if step_function:
-        step_function()
+        with track(f'step.{st.session_state.step}'):
+            step_function()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,52 @@
+"""
+Compara a extração do token do ENEM com a implementação anterior, que
+concatenava o texto de todas as páginas antes de aplicar a regex.
+
+Uso:
+    python -m benchmarks.bench_extract_hash --repeat 20
+"""
+import argparse
+import re
+from io import BytesIO
+
+import pypdf
+
+from benchmarks.common import format_stats, measure
+from benchmarks.pdf_corpus import build_corpus
+from utils.enem import extract_hash_from_pdf
+
+
+def extract_hash_legacy(pdf_file: BytesIO) -> str | None:
+    try:
+        reader = pypdf.PdfReader(pdf_file)
+        full_text = ''
+        for page in reader.pages:
+            full_text += page.extract_text()
+        match = re.search(r'([a-zA-Z0-9=/]+==)', full_text)
+        if match:
+            return match.group(1)
+        return None
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    for name, data in build_corpus().items():
+        print(f'{name} ({len(data) / 1024:.0f} KiB)')
+        for label, func in (
+            ('anterior', extract_hash_legacy),
+            ('atual', extract_hash_from_pdf),
+        ):
+            result = func(BytesIO(data))
+            stats = measure(
+                lambda: func(BytesIO(data)), args.repeat, warmup=1
+            )
+            print('  ' + format_stats(f'{label} -> {result}', stats))
+
+
+if __name__ == '__main__':
+    main()
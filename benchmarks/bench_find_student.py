@@ -0,0 +1,53 @@
+"""
+Compara a busca de aluno via coleção materializada 'alunos' com o $unwind
+sobre 'cursos.ufpb'.
+
+Uso:
+    python -m benchmarks.bench_find_student --alunos 50000 --uri mongodb://...
+"""
+import argparse
+import random
+
+from benchmarks.common import (format_stats, generate_roster, get_bench_db,
+                               matricula_sintetica, measure)
+from core.alunos import CURSOS_COLLECTION, rebuild_alunos
+from core.crud import (find_student_by_matricula,
+                       find_student_by_matricula_in_cursos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--uri', default=None)
+    parser.add_argument('--alunos', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    db = get_bench_db(args.uri)
+    db.drop_collection(CURSOS_COLLECTION)
+    db.drop_collection('alunos')
+    db[CURSOS_COLLECTION].insert_many(list(generate_roster(args.alunos)))
+    print(f'{args.alunos} alunos sintéticos em {CURSOS_COLLECTION}')
+
+    rng = random.Random(0)
+
+    def lookup(func):
+        return lambda: func(
+            db, matricula_sintetica(rng.randrange(args.alunos))
+        )
+
+    # Sem 'alunos' construída, a busca principal cai no caminho de fallback.
+    fallback = measure(lookup(find_student_by_matricula), args.repeat)
+    print(format_stats('fallback ($unwind em cursos.ufpb)', fallback))
+
+    rebuild_alunos(db)
+    indexed = measure(lookup(find_student_by_matricula), args.repeat)
+    print(format_stats("coleção 'alunos' indexada", indexed))
+    unwind = measure(lookup(find_student_by_matricula_in_cursos), 20)
+    print(format_stats('$unwind direto', unwind))
+    print(f'speedup p50: {fallback["p50_ms"] / indexed["p50_ms"]:.1f}x')
+
+    db.client.drop_database(db.name)
+
+
+if __name__ == '__main__':
+    main()
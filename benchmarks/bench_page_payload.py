@@ -0,0 +1,49 @@
+"""
+Mede os bytes de HTML que cada rerun envia ao navegador para o logo e o CSS,
+comparando com o envio anterior (logo em data URI e CSS sem minificar).
+
+Uso:
+    python -m benchmarks.bench_page_payload
+"""
+import base64
+from unittest import mock
+
+import streamlit as st
+
+from app import display_logo
+from utils.style import CSS, STATIC_DIR, load_css
+
+
+def captured_markdown(*funcs) -> list[str]:
+    bodies = []
+    with mock.patch.object(
+        st, 'markdown', side_effect=lambda body, **_: bodies.append(body)
+    ):
+        for func in funcs:
+            func()
+    return bodies
+
+
+def main():
+    logo = base64.b64encode((STATIC_DIR / 'logo.png').read_bytes()).decode()
+    before = {
+        'logo': len(
+            f'<div class="logo-container"><img src="data:image/png;base64,'
+            f'{logo}" class="logo-img"></div>'
+        ),
+        'css': len(f'<style>{CSS}</style>'),
+    }
+    logo_html, css_html = captured_markdown(display_logo, load_css)
+    after = {'logo': len(logo_html), 'css': len(css_html)}
+
+    for part in ('logo', 'css'):
+        print(f'{part:<6} {before[part]:>9} B -> {after[part]:>6} B')
+    total_before, total_after = sum(before.values()), sum(after.values())
+    print(
+        f'total  {total_before:>9} B -> {total_after:>6} B por rerun '
+        f'({100 * (1 - total_after / total_before):.1f}% menor)'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Mede comprovantes por segundo: renderização anterior (logo recodificado a
+cada chamada), template em cache e resultado memorizado.
+
+Uso:
+    python -m benchmarks.bench_receipts --repeat 50
+"""
+import argparse
+from io import BytesIO
+
+from reportlab.lib.colors import HexColor
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
+
+from benchmarks.common import measure
+from utils.generate_pdf import generate_pdf, render_pdf
+from utils.style import STATIC_DIR
+
+SAMPLE = {
+    'Nome': 'ALUNO DE EXEMPLO DA SILVA',
+    'Matricula': '20250012345',
+    'Curso': 'LETRAS',
+    'semester': '2025.2',
+    'turma_escolhida': 'Turma 01',
+    'escolha': 'Cursar disciplina',
+    'token_enem': 'zDdMdIblbpDr/DxLOPgr6w==',
+    'notas_relevantes': {
+        'nota_redacao': '880',
+        'nota_linguagens': '598,7',
+        'nota_predita': 7.1,
+    },
+    'data_ultima_atualizacao': '2025-08-01T10:00:00',
+    'is_update': False,
+}
+
+
+def render_legacy(data: dict) -> bytes:
+    """Partes fixas redesenhadas e logo lido do disco a cada chamada."""
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+    c.drawImage(
+        str(STATIC_DIR / 'logo.png'),
+        x=inch,
+        y=height - 2 * inch,
+        width=1.5 * inch,
+        height=1.5 * inch,
+        preserveAspectRatio=True,
+        mask='auto',
+    )
+    c.setFont('Helvetica-Bold', 20)
+    c.setFillColor(HexColor('#4A7729'))
+    c.drawCentredString(
+        width / 2, height - 1.5 * inch, 'Comprovante de Inscrição'
+    )
+    c.line(inch, height - 2.2 * inch, width - inch, height - 2.2 * inch)
+    y_position = height - 3 * inch
+    for label, value in data.items():
+        c.drawString(inch, y_position, label)
+        c.drawString(3 * inch, y_position, str(value))
+        y_position -= 0.3 * inch
+    c.save()
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    for label, func in (
+        ('anterior', lambda: render_legacy(SAMPLE)),
+        ('template em cache', lambda: render_pdf(SAMPLE)),
+        ('memorizado (rerun)', lambda: generate_pdf(SAMPLE)),
+    ):
+        stats = measure(func, args.repeat)
+        print(
+            f'{label:<20} {1000 / stats["mean_ms"]:10.1f} comprovantes/s '
+            f'(p50 {stats["p50_ms"]:.2f}ms)'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Mede a latência economizada pelas consultas async em cada etapa do app.
+
+Na validação do ENEM compara o caminho sequencial (INEP e, depois, a
+inscrição anterior no MongoDB) com find_enem_and_enrollment, que faz as duas
+consultas em paralelo no loop de utils.aio. Na identificação, onde há uma
+única consulta, mede o custo de passar pelo loop. O INEP é o servidor fake,
+com a latência de --inep-latency, e o cache do ENEM fica desligado.
+
+Uso:
+    python -m benchmarks.bench_validation --uri mongodb://... --repeat 100
+    python -m benchmarks.bench_validation --inep-latency 0.05 0.3
+"""
+import argparse
+import random
+from unittest import mock
+
+from pymongo import AsyncMongoClient
+
+import utils.enem
+from benchmarks.common import (BENCH_DATABASE, bench_uri, format_stats,
+                               generate_enrollments, generate_roster,
+                               get_bench_db, matricula_sintetica, measure,
+                               token_sintetico)
+from benchmarks.fake_inep import FakeInepServer
+from core import crud_async
+from core.alunos import CURSOS_COLLECTION, rebuild_alunos
+from core.crud import (PREVIOUS_CHOICE_PROJECTION,
+                       find_enrollment_by_token_and_semester,
+                       find_student_by_matricula)
+from core.enem_cache import fetch_enem_scores_cached
+from core.indexes import ensure_indexes
+from utils.aio import run
+from utils.inep_client import InepClient
+
+SEMESTER = '2025.2'
+TURMAS = [f'Turma {i:02d}' for i in range(1, 9)]
+
+
+def seed(db, size: int):
+    for name in (CURSOS_COLLECTION, 'alunos', 'inscricoes'):
+        db.drop_collection(name)
+    ensure_indexes(db)
+    db[CURSOS_COLLECTION].insert_many(generate_roster(size))
+    rebuild_alunos(db)
+    db['inscricoes'].insert_many(generate_enrollments(size, SEMESTER, TURMAS))
+
+
+def compare(step: str, sync_stats: dict, async_stats: dict):
+    print(format_stats(f'{step} (síncrono)', sync_stats))
+    print(format_stats(f'{step} (async)', async_stats))
+    saved = sync_stats['p50_ms'] - async_stats['p50_ms']
+    print(f'  economia no p50: {saved:.1f}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--uri', default=None)
+    parser.add_argument('--size', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument(
+        '--inep-latency', type=float, nargs='+', default=[0.05, 0.2]
+    )
+    args = parser.parse_args()
+
+    db = get_bench_db(args.uri)
+    adb = AsyncMongoClient(bench_uri(args.uri))[BENCH_DATABASE]
+    seed(db, args.size)
+    rng = random.Random(0)
+
+    def matricula() -> str:
+        return matricula_sintetica(rng.randrange(args.size))
+
+    def token() -> str:
+        return token_sintetico(rng.randrange(args.size))
+
+    compare(
+        'identificacao',
+        measure(lambda: find_student_by_matricula(db, matricula()), 200),
+        measure(
+            lambda: run(
+                crud_async.find_student_by_matricula(adb, matricula())
+            ),
+            200,
+        ),
+    )
+
+    def sequential():
+        enem_data = fetch_enem_scores_cached(db, token(), use_cache=False)
+        find_enrollment_by_token_and_semester(
+            db, enem_data['hash'], SEMESTER, PREVIOUS_CHOICE_PROJECTION
+        )
+
+    def concurrent():
+        run(
+            crud_async.find_enem_and_enrollment(
+                adb, token(), SEMESTER, use_cache=False
+            )
+        )
+
+    for latency in args.inep_latency:
+        with FakeInepServer(latency=latency) as inep, mock.patch.object(
+            utils.enem, '_inep_client', InepClient(inep.url)
+        ):
+            compare(
+                f'validacao_enem INEP {latency * 1000:.0f}ms',
+                measure(sequential, args.repeat),
+                measure(concurrent, args.repeat),
+            )
+
+    db.client.drop_database(db.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Verifica as falhas e a recuperação do InepClient contra o INEP fake.
+
+Abre o circuito com o servidor fora do ar e, passado o reset_timeout, faz a
+chamada de teste terminar sem resposta do INEP: primeiro recusada pela fila
+do limitador, depois com um erro inesperado no envio. Em seguida, com o
+servidor de volta e a fila livre, as chamadas precisam passar e o circuito
+precisa fechar. Também confere que só um token recusado devolve None, que
+um 429 é refeito depois do Retry-After e que um INEP fora do ar até o fim
+do prazo levanta InepTimeoutError. Termina com código 1 se alguma
+verificação falhar.
+
+Uso:
+    python -m benchmarks.check_inep_client
+"""
+import argparse
+import time
+from unittest import mock
+
+from benchmarks.fake_inep import FakeInepServer
+from utils.inep_client import (CircuitBreaker, InepClient,
+                               InepRateLimitedError, InepTimeoutError,
+                               InepUnavailableError, TokenBucket)
+
+RESET_TIMEOUT = 0.2
+
+
+def open_breaker(client: InepClient, inep: FakeInepServer):
+    inep.down = True
+    try:
+        while client.breaker.state != CircuitBreaker.OPEN:
+            try:
+                client.fetch('aluno-0')
+            except InepUnavailableError:
+                pass
+    finally:
+        inep.down = False
+    time.sleep(RESET_TIMEOUT)
+
+
+def recovers(client: InepClient, calls: int = 3) -> bool:
+    """As próximas `calls` chamadas passam e o circuito fecha."""
+    for i in range(calls):
+        try:
+            if client.fetch(f'aluno-{i}') is None:
+                return False
+        except InepUnavailableError:
+            return False
+    return client.breaker.state == CircuitBreaker.CLOSED
+
+
+def check_rate_limited_probe(inep: FakeInepServer) -> bool:
+    client = InepClient(
+        inep.url,
+        max_retries=2,
+        backoff_base=0.01,
+        breaker=CircuitBreaker(2, RESET_TIMEOUT),
+    )
+    open_breaker(client, inep)
+    # Fila esgotada e espera máxima curta: a próxima chamada é recusada.
+    client.rate_limiter = TokenBucket(rate=5, burst=1, max_wait=0.05)
+    client.rate_limiter.acquire()
+    try:
+        client.fetch('aluno-0')
+        return False
+    except InepRateLimitedError:
+        pass
+    time.sleep(1 / client.rate_limiter.rate)
+    client.rate_limiter = None
+    return recovers(client)
+
+
+def check_failed_probe(inep: FakeInepServer) -> bool:
+    client = InepClient(
+        inep.url,
+        max_retries=2,
+        backoff_base=0.01,
+        breaker=CircuitBreaker(2, RESET_TIMEOUT),
+    )
+    open_breaker(client, inep)
+    with mock.patch.object(
+        client.session, 'post', side_effect=RuntimeError('falha inesperada')
+    ):
+        try:
+            client.fetch('aluno-0')
+            return False
+        except RuntimeError:
+            pass
+    return recovers(client)
+
+
+def check_rejected_token(inep: FakeInepServer) -> bool:
+    client = InepClient(inep.url)
+    return (
+        client.fetch('invalido-0') is None
+        and client.breaker.state == CircuitBreaker.CLOSED
+    )
+
+
+def check_retry_after(inep: FakeInepServer) -> bool:
+    client = InepClient(inep.url, backoff_base=0.01, backoff_max=0.01)
+    inep.throttled, inep.retry_after = 1, 1
+    start = time.monotonic()
+    try:
+        result = client.fetch('aluno-0')
+    finally:
+        inep.throttled = 0
+    return result is not None and time.monotonic() - start >= 1
+
+
+def check_deadline(inep: FakeInepServer) -> bool:
+    client = InepClient(
+        inep.url,
+        max_retries=3,
+        backoff_base=0.01,
+        breaker=CircuitBreaker(10, RESET_TIMEOUT),
+    )
+    inep.down = True
+    try:
+        client.fetch('aluno-0')
+        return False
+    except InepTimeoutError:
+        return True
+    finally:
+        inep.down = False
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__.splitlines()[1]).parse_args()
+    checks = {
+        'teste recusado pelo limitador': check_rate_limited_probe,
+        'teste com erro inesperado': check_failed_probe,
+        'token recusado': check_rejected_token,
+        '429 com Retry-After': check_retry_after,
+        'prazo esgotado': check_deadline,
+    }
+    failures = []
+    with FakeInepServer() as inep:
+        for name, check in checks.items():
+            ok = check(inep)
+            print(f'{name}: {"ok" if ok else "FALHOU"}')
+            if not ok:
+                failures.append(name)
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
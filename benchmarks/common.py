@@ -0,0 +1,116 @@
+"""Utilitários compartilhados pelos benchmarks."""
+import os
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, Iterator
+
+from pymongo import MongoClient
+from pymongo.database import Database
+
+BENCH_DATABASE = 'DLPL_bench'
+
+
+def get_bench_db(uri: str | None = None) -> Database:
+    """
+    Conecta ao MongoDB indicado por `uri` (ou MONGO_URI) e devolve o banco
+    descartável usado pelos benchmarks.
+    """
+    client = MongoClient(bench_uri(uri))
+    client.admin.command('ping')
+    return client[BENCH_DATABASE]
+
+
+def bench_uri(uri: str | None = None) -> str:
+    return uri or os.environ.get('MONGO_URI', 'mongodb://localhost:27017')
+
+
+def generate_roster(
+    total_alunos: int, alunos_por_curso: int = 500, seed: int = 42
+) -> Iterator[Dict[str, Any]]:
+    """Gera documentos sintéticos no formato de 'cursos.ufpb'."""
+    rng = random.Random(seed)
+    for curso_idx, inicio in enumerate(
+        range(0, total_alunos, alunos_por_curso)
+    ):
+        fim = min(inicio + alunos_por_curso, total_alunos)
+        yield {
+            'Nome': f'CURSO {curso_idx:04d}',
+            'Centro': f'CENTRO {curso_idx % 16:02d}',
+            'alunos_ativos': [
+                {
+                    'Matrícula': matricula_sintetica(i),
+                    'Aluno': f'ALUNO {rng.randrange(10**8):08d} {i}',
+                }
+                for i in range(inicio, fim)
+            ],
+        }
+
+
+def matricula_sintetica(indice: int) -> str:
+    return f'20{indice % 10:02d}{indice:08d}'
+
+
+def generate_enrollments(
+    total: int,
+    semester: str,
+    turmas: list[str],
+    seed: int = 42,
+) -> Iterator[Dict[str, Any]]:
+    """Gera documentos sintéticos no formato de 'inscricoes'."""
+    rng = random.Random(seed)
+    for i in range(total):
+        linguagens = rng.uniform(300, 800)
+        redacao = rng.randrange(0, 1001, 20)
+        yield {
+            'Nome': f'ALUNO {i}',
+            'Matricula': matricula_sintetica(i),
+            'Curso': f'CURSO {i // 500:04d}',
+            'Centro': f'CENTRO {i // 500 % 16:02d}',
+            'semester': semester,
+            'token_enem': token_sintetico(i),
+            'turma_escolhida': rng.choice(turmas),
+            'escolha': rng.choice(
+                ['Cursar disciplina', 'Dispensa de disciplina']
+            ),
+            'notas_relevantes': {
+                'nota_redacao': redacao,
+                'nota_linguagens': f'{linguagens:.1f}'.replace('.', ','),
+                'nota_predita': round(
+                    1.5 + 0.006 * linguagens + 0.004 * redacao, 2
+                ),
+            },
+            'data_inscricao': '2025-08-01T10:00:00',
+            'data_ultima_atualizacao': '2025-08-01T10:00:00',
+        }
+
+
+def token_sintetico(indice: int) -> str:
+    return f'sintetico{indice:010d}Tk=='
+
+
+def measure(
+    func: Callable[[], Any], repeat: int, warmup: int = 3
+) -> Dict[str, float]:
+    """Executa `func` repetidamente e devolve estatísticas em milissegundos."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'mean_ms': statistics.fmean(samples),
+        'p50_ms': samples[len(samples) // 2],
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'max_ms': samples[-1],
+    }
+
+
+def format_stats(name: str, stats: Dict[str, float]) -> str:
+    return (
+        f'{name:<40} mean={stats["mean_ms"]:9.3f}ms '
+        f'p50={stats["p50_ms"]:9.3f}ms p95={stats["p95_ms"]:9.3f}ms'
+    )
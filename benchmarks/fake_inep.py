@@ -0,0 +1,158 @@
+"""
+Servidor HTTP local que imita a API de resultados do INEP.
+
+Latência, taxa de erro e indisponibilidade total são configuráveis, o que
+permite exercitar o InepClient e o app sem depender do INEP real.
+
+Uso:
+    python -m benchmarks.fake_inep --port 8765 --latency 0.2 --error-rate 0.1
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+
+def fake_enem_result(hash_token: str) -> Dict[str, Any]:
+    """Resultado determinístico, no formato do INEP, para um token."""
+    digest = int(hashlib.sha256(hash_token.encode()).hexdigest(), 16)
+    return {
+        'hash': hash_token,
+        'nome': f'ALUNO {digest % 10**8:08d}',
+        'redacao': {'nota': str(400 + digest % 600)},
+        'provaObjetiva': [
+            {
+                'areaDeConhecimento': 'Ciências da Natureza e suas Tecnologias',
+                'nota': f'{400 + digest % 401},{digest % 10}',
+            },
+            {
+                'areaDeConhecimento': 'Linguagens, Códigos e suas Tecnologias',
+                'nota': f'{400 + (digest >> 8) % 401},{(digest >> 4) % 10}',
+            },
+        ],
+    }
+
+
+class FakeInepServer:
+    """
+    Servidor fake do INEP em uma thread própria. Tokens que começam com
+    'invalido' recebem 404, como um token recusado. As próximas `throttled`
+    requisições recebem 429 com Retry-After de `retry_after` segundos.
+    """
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.down = False
+        self.throttled = 0
+        self.retry_after = 1
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(
+            ('127.0.0.1', port), self._handler_class()
+        )
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/resultado'
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(
+                self,
+                status: int,
+                body: Dict[str, Any],
+                headers: Dict[str, str] | None = None,
+            ):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                with fake._lock:
+                    fake.requests += 1
+                    fail = fake.down or fake._rng.random() < fake.error_rate
+                    throttled = fake.throttled > 0
+                    if throttled:
+                        fake.throttled -= 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                hash_token = payload.get('hash', '')
+                if throttled:
+                    self._reply(
+                        429,
+                        {'erro': 'muitas requisições'},
+                        {'Retry-After': str(fake.retry_after)},
+                    )
+                elif fail:
+                    self._reply(503, {'erro': 'indisponível'})
+                elif hash_token.startswith('invalido'):
+                    self._reply(404, {'erro': 'não encontrado'})
+                else:
+                    self._reply(200, fake_enem_result(hash_token))
+
+        return Handler
+
+    def start(self) -> 'FakeInepServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeInepServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeInepServer(args.port, args.latency, args.error_rate)
+    print(f'INEP fake em {server.url}')
+    server.start()
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
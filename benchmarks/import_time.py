@@ -0,0 +1,103 @@
+"""
+Mede o tempo de importação do app (partida a frio) com -X importtime.
+
+Cada execução importa o módulo em um interpretador novo. Relata a mediana
+do tempo cumulativo e os imports diretos mais lentos, e termina com código
+1 se a mediana passar de --budget-ms ou se algum dos pacotes de --forbid
+(carregados só no primeiro uso) for importado na partida.
+
+Uso:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 500 --repeat 7
+    python -m benchmarks.import_time --module pages.classificacao --forbid
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+ROOT = Path(__file__).resolve().parent.parent
+LAZY_PACKAGES = ['pypdf', 'reportlab', 'requests']
+
+
+def import_times(module: str) -> Dict[str, tuple[int, int]]:
+    """
+    Importa `module` em um processo novo e devolve, por módulo importado,
+    (profundidade, microssegundos cumulativos).
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        times[name.strip()] = (depth, int(cumulative))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=600.0)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument(
+        '--forbid',
+        nargs='*',
+        default=LAZY_PACKAGES,
+        help='pacotes que não podem ser importados na partida',
+    )
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.repeat)]
+    total_ms = statistics.median(
+        run[args.module][1] / 1000 for run in runs
+    )
+    print(
+        f'import {args.module}: mediana {total_ms:.0f}ms em {args.repeat} '
+        f'execuções (orçamento {args.budget_ms:.0f}ms)'
+    )
+    last = runs[-1]
+    direct = sorted(
+        (
+            (cumulative, name)
+            for name, (depth, cumulative) in last.items()
+            if depth == 1
+        ),
+        reverse=True,
+    )
+    for cumulative, name in direct[: args.top]:
+        print(f'  {name:<40} {cumulative / 1000:8.1f}ms')
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(
+            f'tempo de importação {total_ms:.0f}ms acima do orçamento'
+        )
+    loaded = sorted(
+        package
+        for package in args.forbid
+        if any(
+            name == package or name.startswith(f'{package}.')
+            for name in last
+        )
+    )
+    if loaded:
+        failures.append(f'importados na partida: {", ".join(loaded)}')
+    if failures:
+        for failure in failures:
+            print(failure)
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,351 @@
+"""
+Teste de carga ponta a ponta: alunos simulados percorrem as quatro etapas
+do app.main com o AppTest do Streamlit, contra um INEP fake local.
+
+Os alunos simultâneos são threads de um único processo, como as sessões de
+um servidor Streamlit: caches, fila e disjuntor do INEP (com a configuração
+de produção, limitador incluído), pool do MongoDB, classificação e sandbox
+de PDFs são compartilhados entre eles. O banco pode ser um MongoDB local
+(--mongo-uri) ou, sem ele, o mongomock em memória (pip install mongomock).
+Relata p50/p95/p99 por etapa, vazão, taxa de erros e os contadores do
+estado compartilhado.
+
+Uso:
+    python -m benchmarks.load_test --students 200 --concurrency 50 \\
+        --inep-latency 0.3 --inep-error-rate 0.05
+    python -m benchmarks.load_test --inep-rate 2 --inep-burst 4
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+from unittest import mock
+from unittest.mock import MagicMock
+
+import streamlit as st
+import streamlit.testing.v1.app_test
+import streamlit.testing.v1.local_script_runner
+from pymongo import AsyncMongoClient, MongoClient
+from streamlit import config
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import \
+    MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import \
+    MemoryMediaFileStorage
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.runtime.secrets import Secrets
+from streamlit.testing.v1 import AppTest
+
+import core.database
+import utils.enem
+from benchmarks.common import BENCH_DATABASE
+from benchmarks.fake_inep import FakeInepServer, fake_enem_result
+from core.cache import cache_stats
+from core.database import pool_stats
+from core.enem_cache import enem_cache_stats
+from utils.enem import inep_stats
+from utils.pdf_sandbox import get_pdf_sandbox
+
+SEMESTER = '2025.2'
+TURMAS = ['Turma 01', 'Turma 02', 'Turma 03']
+# Cada etapa medida vai do envio do formulário até a próxima página pronta;
+# 'confirmacao' inclui a renderização do comprovante em 'finalizado'.
+STEPS = ('carregamento', 'identificacao', 'validacao_enem', 'confirmacao')
+
+
+def student(i: int) -> tuple[str, str, str]:
+    """Matrícula, token e nome (igual ao devolvido pelo INEP fake)."""
+    token = f'carga{i:06d}Token=='
+    return f'2019{i:07d}', token, fake_enem_result(token)['nome']
+
+
+def seed(db, students: int):
+    for name in ('config', 'turma', 'cursos.ufpb', 'alunos', 'inscricoes'):
+        db.drop_collection(name)
+    now = datetime.now(timezone.utc)
+    db['config'].insert_one(
+        {
+            'activeSemester': SEMESTER,
+            'cutoffScore': 6.75,
+            'enrollmentStartDate': (now - timedelta(days=1)).isoformat(),
+            'enrollmentEndDate': (now + timedelta(days=1)).isoformat(),
+        }
+    )
+    db['turma'].insert_many(
+        {'semester': SEMESTER, 'is_active': True, 'name': name}
+        for name in TURMAS
+    )
+    db['cursos.ufpb'].insert_one(
+        {
+            'Nome': 'LETRAS',
+            'Centro': 'CCHLA',
+            'alunos_ativos': [
+                {'Matrícula': matricula, 'Aluno': nome}
+                for matricula, _, nome in map(student, range(students))
+            ],
+        }
+    )
+
+
+class _AsyncFacade:
+    """
+    Fachada async mínima sobre o mongomock, que não tem cliente async:
+    cada método vira uma corrotina que executa a chamada síncrona em uma
+    thread, sem travar o loop compartilhado pelas sessões.
+    """
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getitem__(self, name: str) -> '_AsyncFacade':
+        return _AsyncFacade(self._target[name])
+
+    @property
+    def admin(self) -> '_AsyncFacade':
+        return _AsyncFacade(self._target.admin)
+
+    def get_collection(self, name: str, **kwargs) -> '_AsyncFacade':
+        return _AsyncFacade(self._target.get_collection(name, **kwargs))
+
+    def __getattr__(self, name: str):
+        method = getattr(self._target, name)
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+
+        return call
+
+
+class _SharedRuntime(Runtime):
+    """
+    Runtime que o AppTest liga e desliga a cada execução. Como subclasse,
+    as atribuições do AppTest a `_instance` ficam nela, e o Runtime real
+    continua sendo o único, compartilhado por todas as sessões.
+    """
+
+
+def setup(
+    inep_url: str,
+    mongo_uri: str | None,
+    students: int,
+    inep_settings: Dict[str, Any] | None = None,
+):
+    """
+    Prepara o processo para sessões simultâneas do AppTest: um runtime,
+    um cache do script, secrets e opções globais fixos, e um único cliente
+    do MongoDB.
+    """
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(
+        MemoryMediaFileStorage('/mock/media')
+    )
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+    mock.patch.object(
+        streamlit.testing.v1.app_test, 'Runtime', _SharedRuntime
+    ).start()
+    # Como no servidor, o app.py é compilado uma vez para todas as sessões.
+    script_cache = ScriptCache()
+    for module in (
+        streamlit.testing.v1.app_test,
+        streamlit.testing.v1.local_script_runner,
+    ):
+        mock.patch.object(module, 'ScriptCache', lambda: script_cache).start()
+    config.set_option('global.appTest', True)
+    secrets = Secrets()
+    secrets._secrets = {
+        'MONGO_URI': mongo_uri or 'mongodb://mongomock',
+        'ENEM_API_URL': inep_url,
+        'ENEM_PREDICTION_BASE': 1.5,
+        'ENEM_PREDICTION_LINGUAGENS': 0.006,
+        'ENEM_PREDICTION_REDACAO': 0.004,
+        **(inep_settings or {}),
+    }
+    st.secrets = secrets
+
+    if mongo_uri:
+        client = MongoClient(mongo_uri)
+        async_client = AsyncMongoClient(mongo_uri)
+    else:
+        import mongomock
+
+        client = mongomock.MongoClient()
+        async_client = _AsyncFacade(client)
+        seed(client[BENCH_DATABASE], students)
+    mock.patch.object(
+        core.database, 'MongoClient', lambda *a, **k: client
+    ).start()
+    mock.patch.object(
+        core.database, 'AsyncMongoClient', lambda *a, **k: async_client
+    ).start()
+    mock.patch.object(
+        core.database,
+        'get_database',
+        lambda c: c[BENCH_DATABASE] if c else None,
+    ).start()
+    # O cliente do INEP é o de produção, criado pelo app a partir das
+    # secrets na primeira consulta, com o limitador compartilhado.
+    mock.patch.object(utils.enem, '_inep_client', None).start()
+
+
+def _settle(at: AppTest):
+    """
+    Depois de um st.rerun o AppTest mantém no tree widgets da execução
+    interrompida, que não existem mais no session_state; eles são zerados
+    para não quebrar a próxima execução.
+    """
+    for widget in [*at.text_input, *at.selectbox, *at.button]:
+        try:
+            widget.value
+        except KeyError:
+            widget.set_value(None)
+
+
+def run_student(i: int) -> tuple[Dict[str, float], str | None]:
+    """Percorre as etapas como o aluno `i`; devolve tempos e erro."""
+    matricula, token, _ = student(i)
+    at = AppTest.from_file('app.py', default_timeout=120)
+    timings = {}
+
+    def step(name: str, action):
+        _settle(at)
+        start = time.perf_counter()
+        action()
+        at.run()
+        timings[name] = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(f'{name}: {at.exception[0].message}')
+        if at.error:
+            raise RuntimeError(f'{name}: {at.error[0].value}')
+
+    try:
+        step('carregamento', lambda: None)
+        step(
+            'identificacao',
+            lambda: (
+                at.text_input[0].input(matricula),
+                at.button[0].click(),
+            ),
+        )
+        step(
+            'validacao_enem',
+            lambda: (
+                at.text_input(key='manual_token_input').input(token),
+                next(
+                    b for b in at.button if b.label.startswith('Verificar')
+                ).click(),
+            ),
+        )
+        step(
+            'confirmacao',
+            lambda: (
+                at.selectbox[0].select(random.choice(TURMAS)),
+                next(b for b in at.button if 'Inscrição' in b.label).click(),
+            ),
+        )
+        if at.session_state['step'] != 'finalizado':
+            raise RuntimeError(f'terminou em {at.session_state["step"]}')
+    except Exception as e:
+        return timings, str(e)[:120]
+    return timings, None
+
+
+def percentile(samples: list[float], p: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--students', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=25)
+    parser.add_argument('--inep-latency', type=float, default=0.2)
+    parser.add_argument('--inep-error-rate', type=float, default=0.0)
+    parser.add_argument('--mongo-uri', default=None)
+    parser.add_argument(
+        '--inep-rate',
+        type=float,
+        default=None,
+        help='INEP_RATE_LIMIT; sem ele, o padrão de produção',
+    )
+    parser.add_argument(
+        '--inep-burst',
+        type=int,
+        default=None,
+        help='INEP_RATE_BURST; sem ele, o padrão de produção',
+    )
+    args = parser.parse_args()
+    inep_settings = {
+        name: value
+        for name, value in (
+            ('INEP_RATE_LIMIT', args.inep_rate),
+            ('INEP_RATE_BURST', args.inep_burst),
+        )
+        if value is not None
+    }
+
+    if args.mongo_uri:
+        seed(MongoClient(args.mongo_uri)[BENCH_DATABASE], args.students)
+
+    timings = defaultdict(list)
+    errors = Counter()
+
+    with FakeInepServer(
+        latency=args.inep_latency, error_rate=args.inep_error_rate
+    ) as inep, ThreadPoolExecutor(args.concurrency) as executor:
+        setup(inep.url, args.mongo_uri, args.students, inep_settings)
+        # Aquece o processo para não medir a importação do app.
+        AppTest.from_file('app.py', default_timeout=120).run()
+        start = time.perf_counter()
+        for student_timings, error in executor.map(
+            run_student, range(args.students)
+        ):
+            for name, seconds in student_timings.items():
+                timings[name].append(seconds)
+            if error:
+                errors[error.split(':')[0]] += 1
+        elapsed = time.perf_counter() - start
+
+    done = args.students - sum(errors.values())
+    print(
+        f'{args.students} alunos, concorrência {args.concurrency}, '
+        f'{elapsed:.1f}s, {done / elapsed:.2f} inscrições/s, '
+        f'{inep.requests} requisições ao INEP'
+    )
+    for name in STEPS:
+        samples = timings.get(name)
+        if samples:
+            print(
+                f'  {name:<14} n={len(samples):<5} '
+                f'p50={percentile(samples, 0.50):8.0f}ms '
+                f'p95={percentile(samples, 0.95):8.0f}ms '
+                f'p99={percentile(samples, 0.99):8.0f}ms'
+            )
+    print(
+        f'  erros: {dict(errors) or 0} '
+        f'({100 * (1 - done / args.students):.1f}%)'
+    )
+    print_shared_state()
+
+
+def print_shared_state():
+    """Contadores do estado compartilhado pelas sessões do processo."""
+    gauges: Dict[str, Any] = {
+        'inep': inep_stats(),
+        'enem_cache': enem_cache_stats(),
+        'config_cache': cache_stats(),
+        'mongo_pool': pool_stats(),
+        'pdf_sandbox': get_pdf_sandbox().stats(),
+    }
+    for name, stats in gauges.items():
+        values = ', '.join(f'{key}={value}' for key, value in stats.items())
+        print(f'  {name}: {values}')
+
+
+if __name__ == '__main__':
+    main()
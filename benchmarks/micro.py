@@ -0,0 +1,222 @@
+"""
+Micro-benchmarks das funções centrais, comparados a um baseline em JSON.
+
+Cada caso é medido isoladamente. As funções de banco rodam contra o banco
+descartável dos benchmarks, com cadastros e inscrições sintéticos de cada
+tamanho em --sizes. Com --save-baseline os resultados viram o novo
+baseline; sem ele, a execução termina com código 1 se o p50 de algum caso
+piorar mais que --threshold por cento em relação ao baseline.
+
+Uso:
+    python -m benchmarks.micro --save-baseline
+    python -m benchmarks.micro --threshold 20 --sizes 1000 10000
+    python -m benchmarks.micro --skip-db --only extract_hash
+"""
+import argparse
+import itertools
+import json
+import platform
+import random
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator
+
+from pymongo.database import Database
+
+from benchmarks.bench_receipts import SAMPLE
+from benchmarks.common import (format_stats, generate_enrollments,
+                               generate_roster, get_bench_db,
+                               matricula_sintetica, measure, token_sintetico)
+from benchmarks.fake_inep import fake_enem_result
+from benchmarks.pdf_corpus import TOKEN, build_corpus
+from core.alunos import ALUNOS_COLLECTION, CURSOS_COLLECTION, rebuild_alunos
+from core.crud import find_student_by_matricula, get_turmas, save_enrollment
+from core.indexes import ensure_indexes
+from utils.enem import extract_hash_from_pdf, parse_relevant_scores
+from utils.generate_pdf import generate_pdf
+from utils.names import verify_names_match
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+SEMESTER = '2025.2'
+TURMAS = [f'Turma {i:02d}' for i in range(1, 9)]
+
+Case = tuple[str, Callable[[], Any], int]
+
+
+def pure_cases(repeat: int) -> Iterator[Case]:
+    enem_data = fake_enem_result(TOKEN)
+    yield (
+        'parse_relevant_scores',
+        lambda: parse_relevant_scores(enem_data),
+        repeat * 10,
+    )
+    yield (
+        'verify_names_match',
+        lambda: verify_names_match(
+            'JOSÉ DA SILVA CONCEIÇÃO', 'jose da  silva conceicao'
+        ),
+        repeat * 10,
+    )
+    # Matrícula diferente a cada chamada para não medir o resultado
+    # memorizado.
+    counter = itertools.count()
+    yield (
+        'generate_pdf',
+        lambda: generate_pdf({**SAMPLE, 'Matricula': str(next(counter))}),
+        repeat,
+    )
+    for name, data in build_corpus().items():
+        yield (
+            f'extract_hash_from_pdf[{name}]',
+            lambda data=data: extract_hash_from_pdf(BytesIO(data)),
+            max(repeat // 5, 5),
+        )
+
+
+def seed_database(db: Database, size: int):
+    for name in (CURSOS_COLLECTION, ALUNOS_COLLECTION, 'inscricoes', 'turma'):
+        db.drop_collection(name)
+    ensure_indexes(db)
+    db[CURSOS_COLLECTION].insert_many(generate_roster(size))
+    rebuild_alunos(db)
+    db['inscricoes'].insert_many(generate_enrollments(size, SEMESTER, TURMAS))
+    db['turma'].insert_many(
+        {'semester': SEMESTER, 'is_active': True, 'name': name}
+        for name in TURMAS
+    )
+
+
+def db_cases(db: Database, size: int, repeat: int) -> Iterator[Case]:
+    seed_database(db, size)
+    rng = random.Random(size)
+
+    def enrollment(indice: int) -> Dict[str, Any]:
+        return {
+            'token_enem': token_sintetico(indice),
+            'semester': SEMESTER,
+            'turma_escolhida': rng.choice(TURMAS),
+            'escolha': 'Cursar disciplina',
+            'Matricula': matricula_sintetica(indice),
+        }
+
+    new = itertools.count(size)
+    yield (
+        f'find_student_by_matricula[{size}]',
+        lambda: find_student_by_matricula(
+            db, matricula_sintetica(rng.randrange(size))
+        ),
+        repeat,
+    )
+    yield (
+        f'save_enrollment[update,{size}]',
+        lambda: save_enrollment(db, enrollment(rng.randrange(size))),
+        repeat,
+    )
+    yield (
+        f'save_enrollment[insert,{size}]',
+        lambda: save_enrollment(db, enrollment(next(new))),
+        repeat,
+    )
+    yield f'get_turmas[{size}]', lambda: get_turmas(db, SEMESTER), repeat
+
+
+def load_baseline(path: Path) -> Dict[str, Dict[str, float]]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())['results']
+
+
+def save_baseline(path: Path, results: Dict[str, Dict[str, float]]):
+    path.write_text(
+        json.dumps(
+            {
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': results,
+            },
+            indent=2,
+            sort_keys=True,
+        )
+        + '\n'
+    )
+
+
+def regression(
+    stats: Dict[str, float],
+    baseline: Dict[str, float] | None,
+    threshold: float,
+    min_delta_ms: float,
+) -> float | None:
+    """Piora percentual do p50, se passar do limite; senão None."""
+    if not baseline:
+        return None
+    delta = stats['p50_ms'] - baseline['p50_ms']
+    percent = 100 * delta / baseline['p50_ms'] if baseline['p50_ms'] else 0
+    if delta > min_delta_ms and percent > threshold:
+        return percent
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--uri', default=None)
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=25.0,
+        help='piora máxima do p50, em porcentagem, antes de falhar',
+    )
+    parser.add_argument(
+        '--min-delta-ms',
+        type=float,
+        default=0.05,
+        help='ignora pioras absolutas menores que isso (ruído)',
+    )
+    parser.add_argument('--skip-db', action='store_true')
+    parser.add_argument('--only', default=None, help='filtra casos pelo nome')
+    args = parser.parse_args()
+
+    cases = [pure_cases(args.repeat)]
+    if not args.skip_db:
+        db = get_bench_db(args.uri)
+        cases += [db_cases(db, size, args.repeat) for size in args.sizes]
+
+    baseline = load_baseline(args.baseline)
+    results = {}
+    regressions = []
+    for name, func, repeat in itertools.chain.from_iterable(cases):
+        if args.only and args.only not in name:
+            continue
+        stats = results[name] = measure(func, repeat)
+        line = format_stats(name, stats)
+        if name in baseline:
+            base = baseline[name]['p50_ms']
+            line += f' ({100 * (stats["p50_ms"] - base) / base:+.0f}%)'
+        print(line)
+        percent = regression(
+            stats, baseline.get(name), args.threshold, args.min_delta_ms
+        )
+        if percent is not None:
+            regressions.append(f'{name}: p50 {percent:+.0f}%')
+
+    if not args.skip_db:
+        db.client.drop_database(db.name)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, {**baseline, **results})
+        print(f'baseline salvo em {args.baseline}')
+    elif regressions:
+        print(f'Regressões acima de {args.threshold:.0f}%:')
+        for item in regressions:
+            print(f'  {item}')
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
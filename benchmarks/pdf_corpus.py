@@ -0,0 +1,70 @@
+"""
+Corpus sintético de PDFs para os benchmarks de extração do token do ENEM.
+
+Inclui documentos no formato do boletim do ENEM e casos patológicos
+(muitas páginas, token no fim, texto denso, token ausente e arquivo acima
+do limite de upload).
+"""
+from io import BytesIO
+from typing import Dict
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+TOKEN = 'zDdMdIblbpDr/DxLOPgr6w=='
+
+
+def _boletim_page(c: canvas.Canvas, token: str | None, extra_lines: int = 0):
+    width, height = A4
+    c.setFont('Helvetica-Bold', 14)
+    c.drawString(60, height - 60, 'Resultado Individual - ENEM')
+    c.setFont('Helvetica', 10)
+    y = height - 100
+    linhas = [
+        'Nome: ALUNO DE EXEMPLO DA SILVA',
+        'Número de inscrição: 231000000000',
+        'Ciências da Natureza e suas Tecnologias: 612,3',
+        'Ciências Humanas e suas Tecnologias: 640,1',
+        'Linguagens, Códigos e suas Tecnologias: 598,7',
+        'Matemática e suas Tecnologias: 701,4',
+        'Redação: 880',
+    ]
+    linhas += [f'Texto informativo {i} ' * 6 for i in range(extra_lines)]
+    for linha in linhas:
+        c.drawString(60, y, linha[:110])
+        y -= 14
+        if y < 80:
+            c.showPage()
+            c.setFont('Helvetica', 10)
+            y = height - 60
+    if token:
+        c.drawString(60, 60, f'Chave de validação: {token}')
+    c.showPage()
+
+
+def _pdf(pages: int, token_page: int | None, extra_lines: int = 0) -> bytes:
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    for i in range(pages):
+        _boletim_page(
+            c, TOKEN if i == token_page else None, extra_lines if i else 0
+        )
+    c.save()
+    return buffer.getvalue()
+
+
+def _oversized() -> bytes:
+    data = _pdf(1, 0)
+    return data + b'%' + b'0' * (6 * 1024 * 1024)
+
+
+def build_corpus() -> Dict[str, bytes]:
+    """Gera o corpus; as chaves descrevem cada caso."""
+    return {
+        'enem_1_pagina': _pdf(1, 0),
+        'enem_2_paginas': _pdf(2, 0, extra_lines=40),
+        'token_na_pagina_3': _pdf(3, 2, extra_lines=40),
+        'texto_denso_sem_token': _pdf(3, None, extra_lines=600),
+        'muitas_paginas_token_no_fim': _pdf(200, 199),
+        'acima_do_limite': _oversized(),
+    }
@@ -0,0 +1,92 @@
+"""
+Relata a memória ocupada por sessão no passo de confirmação.
+
+Compara o session_state antigo (JSON completo do INEP e documento inteiro
+da inscrição) com o registro compacto de utils.session e projeta o total
+para --sessions sessões simultâneas. Com --payload, mede uma resposta
+real do INEP salva em JSON em vez da resposta do servidor fake.
+
+Uso:
+    python -m benchmarks.session_memory --sessions 5000
+    python -m benchmarks.session_memory --payload resposta_inep.json
+"""
+import argparse
+import json
+from pathlib import Path
+
+from bson import ObjectId
+
+from benchmarks.common import generate_enrollments
+from benchmarks.fake_inep import fake_enem_result
+from benchmarks.pdf_corpus import TOKEN
+from core.crud import PREVIOUS_CHOICE_PROJECTION
+from utils.session import EnemSession, session_footprint
+
+
+def base_state(enrollment: dict) -> dict:
+    return {
+        'step': 'confirmacao',
+        'matricula': enrollment['Matricula'],
+        'aluno_data': {
+            key: enrollment[key]
+            for key in ('Nome', 'Matricula', 'Curso', 'Centro')
+        },
+        'is_update': True,
+        'is_calouro': False,
+        'info_message': '',
+    }
+
+
+def legacy_state(enem_data: dict, enrollment: dict) -> dict:
+    return {
+        **base_state(enrollment),
+        'enem_data': enem_data,
+        'existing_enrollment': enrollment,
+    }
+
+
+def compact_state(enem_data: dict, enrollment: dict) -> dict:
+    previous = {
+        key: enrollment[key]
+        for key, include in PREVIOUS_CHOICE_PROJECTION.items()
+        if include
+    }
+    return {
+        **base_state(enrollment),
+        'enem': EnemSession.from_validation(enem_data, previous),
+    }
+
+
+def print_footprint(label: str, footprint: dict, sessions: int):
+    print(f'{label}: {footprint["total"]} bytes por sessão')
+    for key, size in sorted(footprint.items(), key=lambda item: -item[1]):
+        if key != 'total':
+            print(f'  {key:<20} {size:>8}')
+    total_mb = footprint['total'] * sessions / 2**20
+    print(f'  {sessions} sessões: {total_mb:.1f} MiB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--payload', type=Path, default=None)
+    args = parser.parse_args()
+
+    enem_data = (
+        json.loads(args.payload.read_text())
+        if args.payload
+        else fake_enem_result(TOKEN)
+    )
+    enrollment = next(generate_enrollments(1, '2025.2', ['Turma 01']))
+    enrollment['_id'] = ObjectId()
+
+    legacy = session_footprint(legacy_state(enem_data, enrollment))
+    compact = session_footprint(compact_state(enem_data, enrollment))
+    print_footprint('Antes', legacy, args.sessions)
+    print_footprint('Registro compacto', compact, args.sessions)
+    saved = 100 * (1 - compact['total'] / legacy['total'])
+    print(f'Economia: {saved:.0f}% por sessão')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+from typing import Any, Dict
+from uuid import uuid4
+
+from pymongo import ASCENDING, UpdateOne
+from pymongo.database import Database
+
+from utils.names import normalize_name
+
+ALUNOS_COLLECTION = 'alunos'
+CURSOS_COLLECTION = 'cursos.ufpb'
+CALOUROS_COLLECTION = 'calouros'
+
+
+def _alunos_pipeline(match: Dict[str, Any] | None = None) -> list:
+    """
+    Pipeline que achata 'cursos.ufpb' em um documento por aluno, já com
+    Curso e Centro desnormalizados.
+    """
+    pipeline = [{'$match': match}] if match else []
+    pipeline += [
+        {'$unwind': '$alunos_ativos'},
+        {
+            '$project': {
+                '_id': 0,
+                'Nome': '$alunos_ativos.Aluno',
+                'Matricula': '$alunos_ativos.Matrícula',
+                'nome_normalizado': '$alunos_ativos.nome_normalizado',
+                'Curso': '$Nome',
+                'Centro': '$Centro',
+                'curso_id': '$_id',
+            }
+        },
+    ]
+    return pipeline
+
+
+def ensure_alunos_indexes(db: Database):
+    """Garante os índices da coleção materializada 'alunos'."""
+    collection = db[ALUNOS_COLLECTION]
+    collection.create_index(
+        [('Matricula', ASCENDING)], unique=True, name='matricula_unique'
+    )
+    collection.create_index([('curso_id', ASCENDING)], name='curso_id')
+    collection.create_index(
+        [('nome_normalizado', ASCENDING)], name='nome_normalizado'
+    )
+
+
+def fill_normalized_names(
+    db: Database,
+    collection: str = ALUNOS_COLLECTION,
+    match: Dict[str, Any] | None = None,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Calcula 'nome_normalizado' dos documentos que ainda não o têm (cadastros
+    anteriores à chave). Retorna quantos documentos foram atualizados.
+    """
+    query = {**(match or {}), 'nome_normalizado': {'$exists': False}}
+    operations = []
+    updated = 0
+    for doc in db[collection].find(query, {'Nome': 1}):
+        key = normalize_name(doc.get('Nome'))
+        operations.append(
+            UpdateOne({'_id': doc['_id']}, {'$set': {'nome_normalizado': key}})
+        )
+        if len(operations) == batch_size:
+            updated += db[collection].bulk_write(operations).modified_count
+            operations = []
+    if operations:
+        updated += db[collection].bulk_write(operations).modified_count
+    return updated
+
+
+def _merge_alunos(
+    db: Database, match: Dict[str, Any] | None = None
+) -> str:
+    """
+    Grava em 'alunos' os alunos dos cursos selecionados por `match` e
+    devolve o identificador da sincronização usado para marcar os documentos.
+    """
+    sync_id = uuid4().hex
+    pipeline = _alunos_pipeline(match) + [
+        {'$addFields': {'sync_id': sync_id}},
+        {
+            '$merge': {
+                'into': ALUNOS_COLLECTION,
+                'on': 'Matricula',
+                'whenMatched': 'replace',
+                'whenNotMatched': 'insert',
+            }
+        },
+    ]
+    db[CURSOS_COLLECTION].aggregate(pipeline)
+    return sync_id
+
+
+def rebuild_alunos(db: Database) -> int:
+    """
+    Reconstrói a coleção 'alunos' a partir de 'cursos.ufpb'.
+    Os documentos são substituídos no lugar, então as consultas continuam
+    atendidas durante a reconstrução. Retorna o total de alunos.
+    """
+    ensure_alunos_indexes(db)
+    sync_id = _merge_alunos(db)
+    db[ALUNOS_COLLECTION].delete_many({'sync_id': {'$ne': sync_id}})
+    fill_normalized_names(db)
+    return db[ALUNOS_COLLECTION].count_documents({})
+
+
+def sync_curso_alunos(db: Database, curso_id: Any) -> int:
+    """
+    Sincroniza em 'alunos' apenas os alunos de um curso, removendo os que
+    saíram de 'alunos_ativos'. Retorna o total de alunos do curso.
+    """
+    sync_id = _merge_alunos(db, {'_id': curso_id})
+    db[ALUNOS_COLLECTION].delete_many(
+        {'curso_id': curso_id, 'sync_id': {'$ne': sync_id}}
+    )
+    fill_normalized_names(db, match={'curso_id': curso_id})
+    return db[ALUNOS_COLLECTION].count_documents({'curso_id': curso_id})
+
+
+def watch_cursos(db: Database):
+    """
+    Mantém 'alunos' sincronizada ouvindo o change stream de 'cursos.ufpb'.
+    Gera (operação, curso_id) a cada alteração aplicada; requer replica set.
+    """
+    with db[CURSOS_COLLECTION].watch() as stream:
+        for change in stream:
+            curso_id = change['documentKey']['_id']
+            if change['operationType'] == 'delete':
+                db[ALUNOS_COLLECTION].delete_many({'curso_id': curso_id})
+            else:
+                sync_curso_alunos(db, curso_id)
+            yield change['operationType'], curso_id
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict
+
+from cachetools import TTLCache
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.database import Database
+
+from core.crud import get_configuracoes, get_turmas, read_replica
+
+CACHE_TTL_SECONDS = 300
+VERSION_CHECK_SECONDS = 10
+VERSION_FIELD = 'configVersion'
+
+_UNSET = object()
+
+
+class VersionedCache:
+    """
+    Cache TTL compartilhado por todas as sessões do processo. É esvaziado
+    sempre que o campo de versão do documento de configuração muda.
+    """
+
+    def __init__(self, ttl: float, version_check_interval: float):
+        self._entries = TTLCache(maxsize=256, ttl=ttl)
+        self._lock = threading.Lock()
+        self._version = _UNSET
+        self._version_checked_at = float('-inf')
+        self._version_check_interval = version_check_interval
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def get(self, key: tuple, loader: Callable[[], Any]) -> Any:
+        name = key[0]
+        with self._lock:
+            if key in self._entries:
+                self.hits[name] += 1
+                return self._entries[key]
+            self.misses[name] += 1
+        value = loader()
+        if value:
+            with self._lock:
+                self._entries[key] = value
+        return value
+
+    def check_version(self, fetch_version: Callable[[], Any]):
+        """Consulta a versão no máximo uma vez por intervalo."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._version_checked_at < self._version_check_interval:
+                return
+            self._version_checked_at = now
+        version = fetch_version()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = _UNSET
+            self._version_checked_at = float('-inf')
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            names = set(self.hits) | set(self.misses)
+            return {
+                name: {
+                    'hits': self.hits[name],
+                    'misses': self.misses[name],
+                }
+                for name in sorted(names)
+            } | {'entries': len(self._entries)}
+
+
+_cache = VersionedCache(CACHE_TTL_SECONDS, VERSION_CHECK_SECONDS)
+
+
+def _fetch_config_version(db: Database) -> Any:
+    doc = read_replica(db, 'config').find_one(
+        {}, {VERSION_FIELD: 1}, sort=[('_id', ASCENDING)]
+    )
+    return doc.get(VERSION_FIELD) if doc else None
+
+
+def get_configuracoes_cached(db: Database) -> Dict[str, Any]:
+    """Versão em cache de core.crud.get_configuracoes."""
+    _cache.check_version(lambda: _fetch_config_version(db))
+    config = _cache.get(('config',), lambda: get_configuracoes(db))
+    return dict(config)
+
+
+def get_turmas_cached(db: Database, semestre: str) -> list[str]:
+    """Versão em cache de core.crud.get_turmas."""
+    _cache.check_version(lambda: _fetch_config_version(db))
+    return list(
+        _cache.get(('turmas', semestre), lambda: get_turmas(db, semestre))
+    )
+
+
+def bump_config_version(db: Database) -> int:
+    """
+    Incrementa a versão das configurações, fazendo todos os processos
+    descartarem o cache em até VERSION_CHECK_SECONDS.
+    """
+    doc = db['config'].find_one_and_update(
+        {},
+        {'$inc': {VERSION_FIELD: 1}},
+        sort=[('_id', ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc.get(VERSION_FIELD) if doc else 0
+
+
+def invalidate_cache():
+    """Descarta imediatamente o cache deste processo."""
+    _cache.invalidate()
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Contadores de acertos e faltas do cache deste processo."""
+    return _cache.stats()
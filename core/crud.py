@@ -1,16 +1,91 @@
 from datetime import datetime
 from typing import Any, Dict
 
+from pymongo import ASCENDING, DESCENDING, ReadPreference, ReturnDocument
 from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError
 
+from core.alunos import (ALUNOS_COLLECTION, CALOUROS_COLLECTION,
+                         CURSOS_COLLECTION)
+from core.occupancy import apply_occupancy, reserve_seat
+from core.ranking import record_enrollment
+from utils.metrics import timed
 
+ALUNO_PROJECTION = {
+    '_id': 0,
+    'Nome': 1,
+    'Matricula': 1,
+    'nome_normalizado': 1,
+    'Curso': 1,
+    'Centro': 1,
+}
+CALOURO_PROJECTION = {
+    '_id': 0,
+    'Nome': 1,
+    'Matricula': 1,
+    'nome_normalizado': 1,
+    'Curso': 1,
+    'Centro': 1,
+}
+# Da inscrição anterior, o formulário só reaproveita as escolhas.
+PREVIOUS_CHOICE_PROJECTION = {'_id': 0, 'turma_escolhida': 1, 'escolha': 1}
+
+
+class AmbiguousCalouroError(Exception):
+    """Mais de um ingressante da lista tem o nome procurado."""
+
+    def __init__(self, nome_normalizado: str):
+        super().__init__(
+            f"Mais de um ingressante se chama '{nome_normalizado}'."
+        )
+        self.nome_normalizado = nome_normalizado
+
+
+def read_replica(db: Database, name: str):
+    """
+    Coleção de cadastro ou configuração lida de preferência em um
+    secundário. Gravações e as leituras de 'inscricoes' ficam no primário.
+    """
+    return db.get_collection(
+        name, read_preference=ReadPreference.SECONDARY_PREFERRED
+    )
+
+
+@timed('mongo.find_student_by_matricula')
 def find_student_by_matricula(
     db: Database, matricula: str
+) -> Dict[str, Any] | None:
+    """
+    Busca um aluno pela matrícula na coleção materializada 'alunos'.
+    Enquanto a coleção não tiver sido construída, recorre ao $unwind em
+    'cursos.ufpb'.
+    """
+    alunos = read_replica(db, ALUNOS_COLLECTION)
+    aluno = alunos.find_one({'Matricula': matricula}, ALUNO_PROJECTION)
+    if aluno:
+        return aluno
+    if alunos.estimated_document_count() == 0:
+        return find_student_by_matricula_in_cursos(db, matricula)
+    return None
+
+
+@timed('mongo.find_student_by_matricula_in_cursos')
+def find_student_by_matricula_in_cursos(
+    db: Database, matricula: str
 ) -> Dict[str, Any] | None:
     """
     Busca um aluno na coleção 'cursos.ufpb' pela sua matrícula.
     """
-    pipeline = [
+    cursos = read_replica(db, CURSOS_COLLECTION)
+    result = list(cursos.aggregate(student_in_cursos_pipeline(matricula)))
+    if result:
+        return result[0]
+    return None
+
+
+def student_in_cursos_pipeline(matricula: str) -> list[Dict[str, Any]]:
+    return [
+        {'$match': {'alunos_ativos.Matrícula': matricula}},
         {'$unwind': '$alunos_ativos'},
         {'$match': {'alunos_ativos.Matrícula': matricula}},
         {
@@ -18,56 +93,130 @@ def find_student_by_matricula(
                 '_id': 0,
                 'Nome': '$alunos_ativos.Aluno',
                 'Matricula': '$alunos_ativos.Matrícula',
+                'nome_normalizado': '$alunos_ativos.nome_normalizado',
                 'Curso': '$Nome',
                 'Centro': '$Centro',
             }
         },
     ]
-    result = list(db['cursos.ufpb'].aggregate(pipeline))
-    if result:
-        return result[0]
-    return None
 
 
+def calouro_filter(
+    nome_normalizado: str, matricula: str | None = None
+) -> Dict[str, Any]:
+    filtro = {'nome_normalizado': nome_normalizado}
+    if matricula:
+        # Ingressantes listados sem matrícula continuam valendo pelo nome.
+        filtro['Matricula'] = {'$in': [matricula, None]}
+    return filtro
+
+
+# Com a matrícula informada, o ingressante que a tem vem antes dos listados
+# sem matrícula; o segundo documento só serve para detectar homônimos.
+CALOURO_SORT = [('Matricula', DESCENDING)]
+
+
+def pick_calouro(
+    docs: list[Dict[str, Any]], matricula: str | None = None
+) -> Dict[str, Any] | None:
+    """
+    Escolhe entre os (no máximo dois) documentos de calouro_filter. Sem
+    matrícula que os desempate, homônimos levantam AmbiguousCalouroError.
+    """
+    if not docs:
+        return None
+    if matricula and docs[0].get('Matricula') == matricula:
+        return docs[0]
+    if len(docs) > 1:
+        raise AmbiguousCalouroError(docs[0]['nome_normalizado'])
+    return docs[0]
+
+
+@timed('mongo.find_calouro_by_name')
+def find_calouro_by_name(
+    db: Database, nome_normalizado: str, matricula: str | None = None
+) -> Dict[str, Any] | None:
+    """
+    Busca um ingressante na lista de calouros pelo nome normalizado
+    (utils.names.normalize_name) e, se a lista a tiver, pela matrícula.
+    """
+    cursor = (
+        read_replica(db, CALOUROS_COLLECTION)
+        .find(calouro_filter(nome_normalizado, matricula), CALOURO_PROJECTION)
+        .sort(CALOURO_SORT)
+        .limit(2)
+    )
+    return pick_calouro(list(cursor), matricula)
+
+
+def has_calouros_list(db: Database) -> bool:
+    """Indica se a lista de ingressantes do período já foi importada."""
+    calouros = read_replica(db, CALOUROS_COLLECTION)
+    return calouros.estimated_document_count() > 0
+
+
+@timed('mongo.find_enrollment_by_token_and_semester')
 def find_enrollment_by_token_and_semester(
-    db: Database, token: str, semester: str
+    db: Database,
+    token: str,
+    semester: str,
+    projection: Dict[str, Any] | None = None,
 ) -> Dict[str, Any] | None:
     """
     Busca uma inscrição na coleção 'inscricoes' pelo token do ENEM.
     """
     return db['inscricoes'].find_one(
-        {'token_enem': token, 'semester': semester}
+        enrollment_filter(token, semester), projection
     )
 
 
+def enrollment_filter(token: str, semester: str) -> Dict[str, Any]:
+    """Filtro que identifica uma inscrição (coberto por índice único)."""
+    return {'token_enem': token, 'semester': semester}
+
+
+@timed('mongo.get_configuracoes')
 def get_configuracoes(db: Database) -> Dict[str, Any]:
     """Busca as configurações ativas do sistema na coleção 'config'.
     Config só terá um documento.
     """
-    config = db['config'].find_one()
+    config = read_replica(db, 'config').find_one(
+        {}, sort=[('_id', ASCENDING)]
+    )
     return config if config else {}
 
 
+@timed('mongo.get_turmas')
 def get_turmas(db: Database, semestre: str) -> list[str]:
     """Busca as turmas disponíveis para o semestre atual na coleção 'turmas'."""
-    collection = db['turma']
-    results = collection.find(
-        {'semester': semestre, 'is_active': True}, {'_id': 0, 'name': 1}
-    )
+    collection = read_replica(db, 'turma')
+    results = collection.find(turmas_filter(semestre), {'_id': 0, 'name': 1})
     return [doc['name'] for doc in results]
 
 
-def save_enrollment(db: Database, enrollment_data: Dict[str, Any]):
+def turmas_filter(semestre: str) -> Dict[str, Any]:
+    return {'semester': semestre, 'is_active': True}
+
+
+@timed('mongo.save_enrollment')
+def save_enrollment(
+    db: Database,
+    enrollment_data: Dict[str, Any],
+    enforce_capacity: bool = False,
+) -> Dict[str, Any] | None:
     """
     Salva ou atualiza os dados de uma inscrição na coleção 'inscricoes'.
     Usa o token_enem como identificador. Ao atualizar, altera apenas os campos
-    necessários, preservando os dados originais.
+    necessários, preservando os dados originais. A classificação em memória
+    (core.ranking) e os contadores de ocupação das turmas (core.occupancy)
+    são atualizados em seguida. Com `enforce_capacity`, levanta
+    TurmaFullError se a turma não tiver vaga. Retorna a turma e a escolha
+    anteriores, ou None se a inscrição é nova.
     """
     collection = db['inscricoes']
-    filter_query = {
-        'token_enem': enrollment_data['token_enem'],
-        'semester': enrollment_data['semester'],
-    }
+    filter_query = enrollment_filter(
+        enrollment_data['token_enem'], enrollment_data['semester']
+    )
     update_fields = {
         'turma_escolhida': enrollment_data['turma_escolhida'],
         'escolha': enrollment_data['escolha'],
@@ -82,5 +231,40 @@ def save_enrollment(db: Database, enrollment_data: Dict[str, Any]):
         '$set': update_fields,
         '$setOnInsert': initial_insert_fields,
     }
-    result = collection.update_one(filter_query, update_query, upsert=True)
-    return result
+    semester = enrollment_data['semester']
+    reserved = {}
+    if enforce_capacity:
+        reserved = reserve_seat(
+            db,
+            semester,
+            collection.find_one(filter_query, PREVIOUS_CHOICE_PROJECTION),
+            update_fields,
+        )
+    try:
+        try:
+            previous = collection.find_one_and_update(
+                filter_query,
+                update_query,
+                projection=PREVIOUS_CHOICE_PROJECTION,
+                upsert=True,
+                return_document=ReturnDocument.BEFORE,
+            )
+        except DuplicateKeyError:
+            # Dois upserts simultâneos do mesmo aluno: o índice único barra
+            # o segundo insert, que é refeito como atualização do documento
+            # criado.
+            previous = collection.find_one_and_update(
+                filter_query,
+                update_query,
+                projection=PREVIOUS_CHOICE_PROJECTION,
+                return_document=ReturnDocument.BEFORE,
+            )
+    except BaseException:
+        # A inscrição não foi gravada: devolve a vaga reservada.
+        apply_occupancy(db, semester, None, None, reserved)
+        raise
+    # A variação vem do documento anterior lido na própria gravação: os
+    # contadores seguem a transição que de fato aconteceu.
+    apply_occupancy(db, semester, previous, update_fields, reserved)
+    record_enrollment({**initial_insert_fields, **update_fields})
+    return previous
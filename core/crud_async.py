@@ -0,0 +1,125 @@
+import asyncio
+from typing import Any, Callable, Dict
+
+from pymongo import ASCENDING
+from pymongo.asynchronous.database import AsyncDatabase
+
+from core.alunos import (ALUNOS_COLLECTION, CALOUROS_COLLECTION,
+                         CURSOS_COLLECTION)
+from core.crud import (ALUNO_PROJECTION, CALOURO_PROJECTION, CALOURO_SORT,
+                       PREVIOUS_CHOICE_PROJECTION, calouro_filter,
+                       enrollment_filter, pick_calouro, read_replica,
+                       student_in_cursos_pipeline, turmas_filter)
+from core.enem_cache import fetch_enem_scores_cached_async
+from utils.metrics import timed
+
+
+@timed('mongo_async.find_student_by_matricula')
+async def find_student_by_matricula(
+    db: AsyncDatabase, matricula: str
+) -> Dict[str, Any] | None:
+    """
+    Versão async de core.crud.find_student_by_matricula. Como as demais
+    funções deste módulo, roda no loop de utils.aio.
+    """
+    alunos = read_replica(db, ALUNOS_COLLECTION)
+    aluno = await alunos.find_one({'Matricula': matricula}, ALUNO_PROJECTION)
+    if aluno:
+        return aluno
+    if await alunos.estimated_document_count() == 0:
+        return await find_student_by_matricula_in_cursos(db, matricula)
+    return None
+
+
+async def find_student_by_matricula_in_cursos(
+    db: AsyncDatabase, matricula: str
+) -> Dict[str, Any] | None:
+    cursor = await read_replica(db, CURSOS_COLLECTION).aggregate(
+        student_in_cursos_pipeline(matricula)
+    )
+    result = await cursor.to_list(1)
+    if result:
+        return result[0]
+    return None
+
+
+@timed('mongo_async.find_calouro_by_name')
+async def find_calouro_by_name(
+    db: AsyncDatabase, nome_normalizado: str, matricula: str | None = None
+) -> Dict[str, Any] | None:
+    cursor = (
+        read_replica(db, CALOUROS_COLLECTION)
+        .find(calouro_filter(nome_normalizado, matricula), CALOURO_PROJECTION)
+        .sort(CALOURO_SORT)
+        .limit(2)
+    )
+    return pick_calouro(await cursor.to_list(2), matricula)
+
+
+async def has_calouros_list(db: AsyncDatabase) -> bool:
+    calouros = read_replica(db, CALOUROS_COLLECTION)
+    return await calouros.estimated_document_count() > 0
+
+
+@timed('mongo_async.find_enrollment_by_token_and_semester')
+async def find_enrollment_by_token_and_semester(
+    db: AsyncDatabase,
+    token: str,
+    semester: str,
+    projection: Dict[str, Any] | None = None,
+) -> Dict[str, Any] | None:
+    return await db['inscricoes'].find_one(
+        enrollment_filter(token, semester), projection
+    )
+
+
+@timed('mongo_async.get_configuracoes')
+async def get_configuracoes(db: AsyncDatabase) -> Dict[str, Any]:
+    config = await read_replica(db, 'config').find_one(
+        {}, sort=[('_id', ASCENDING)]
+    )
+    return config if config else {}
+
+
+@timed('mongo_async.get_turmas')
+async def get_turmas(db: AsyncDatabase, semestre: str) -> list[str]:
+    cursor = read_replica(db, 'turma').find(
+        turmas_filter(semestre), {'_id': 0, 'name': 1}
+    )
+    return [doc['name'] async for doc in cursor]
+
+
+async def find_enem_and_enrollment(
+    db: AsyncDatabase,
+    hash_token: str,
+    semester: str,
+    use_cache: bool = True,
+    on_wait: Callable[[int, float], None] | None = None,
+) -> tuple[Dict[str, Any] | None, Dict[str, Any] | None]:
+    """
+    Consulta o INEP e, ao mesmo tempo, a inscrição anterior do token
+    enviado (só as escolhas). Se o INEP devolver outro hash, a inscrição é
+    buscada de novo por ele. Retorna (resultado do ENEM, inscrição).
+    """
+    enem_task = asyncio.create_task(
+        fetch_enem_scores_cached_async(db, hash_token, use_cache, on_wait)
+    )
+    enrollment_task = asyncio.create_task(
+        find_enrollment_by_token_and_semester(
+            db, hash_token, semester, PREVIOUS_CHOICE_PROJECTION
+        )
+    )
+    try:
+        enem_data = await enem_task
+    except BaseException:
+        enrollment_task.cancel()
+        raise
+    if not enem_data:
+        enrollment_task.cancel()
+        return None, None
+    existing_enrollment = await enrollment_task
+    if enem_data.get('hash') != hash_token:
+        existing_enrollment = await find_enrollment_by_token_and_semester(
+            db, enem_data.get('hash'), semester, PREVIOUS_CHOICE_PROJECTION
+        )
+    return enem_data, existing_enrollment
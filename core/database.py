@@ -1,23 +1,196 @@
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict
+
 import streamlit as st
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient, MongoClient
 from pymongo.database import Database
+from pymongo.errors import PyMongoError
+from pymongo.monitoring import ConnectionPoolListener
 from pymongo.server_api import ServerApi
 
+from core.indexes import ensure_indexes
+from utils.aio import run
+from utils.metrics import is_enabled, observe
+
+# Opções do MongoClient lidas de variáveis de ambiente ou das secrets (as
+# variáveis têm precedência): nome -> (opção do pymongo, conversão, padrão).
+CLIENT_SETTINGS = {
+    'MONGO_MAX_POOL_SIZE': ('maxPoolSize', int, 100),
+    'MONGO_MIN_POOL_SIZE': ('minPoolSize', int, 0),
+    'MONGO_MAX_IDLE_TIME_MS': ('maxIdleTimeMS', int, None),
+    'MONGO_WAIT_QUEUE_TIMEOUT_MS': ('waitQueueTimeoutMS', int, None),
+    'MONGO_SERVER_SELECTION_TIMEOUT_MS': (
+        'serverSelectionTimeoutMS',
+        int,
+        10_000,
+    ),
+    'MONGO_CONNECT_TIMEOUT_MS': ('connectTimeoutMS', int, 10_000),
+    'MONGO_SOCKET_TIMEOUT_MS': ('socketTimeoutMS', int, None),
+    # Lista separada por vírgulas, como 'zstd,zlib'; zstd e snappy exigem
+    # os pacotes zstandard e python-snappy.
+    'MONGO_COMPRESSORS': ('compressors', str, None),
+}
+# Intervalo mínimo entre tentativas de conexão depois de uma falha, para
+# que as sessões abertas não repitam o timeout a cada execução.
+RETRY_INTERVAL_SECONDS = 5
+
+
+def _setting(name: str, cast: Callable[[Any], Any], default: Any) -> Any:
+    value = os.environ.get(name)
+    if value is None:
+        value = st.secrets.get(name)
+    if value is None or value == '':
+        return default
+    return cast(value)
+
+
+def client_options() -> Dict[str, Any]:
+    """Opções de pool, timeouts e compressão comuns aos dois clientes."""
+    options = {'server_api': ServerApi('1'), 'event_listeners': [_pool]}
+    for name, (option, cast, default) in CLIENT_SETTINGS.items():
+        value = _setting(name, cast, default)
+        if value is not None:
+            options[option] = value
+    return options
+
+
+class PoolMonitor(ConnectionPoolListener):
+    """
+    Acompanha os pools de conexão pelos eventos de monitoramento do pymongo:
+    o tempo de espera de cada checkout vai para o histograma
+    'mongo.pool_checkout' e os totais ficam em stats().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = Counter()
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counters[key] += 1
+
+    def connection_checked_out(self, event):
+        self._count('checked_out')
+        if is_enabled() and event.duration is not None:
+            observe('mongo.pool_checkout', event.duration)
+
+    def connection_check_out_failed(self, event):
+        self._count(f'checkout_failed_{event.reason}')
+        if is_enabled() and event.duration is not None:
+            observe(
+                'mongo.pool_checkout', event.duration, outcome=event.reason
+            )
+
+    def connection_checked_in(self, event):
+        self._count('checked_in')
+
+    def connection_created(self, event):
+        self._count('created')
+
+    def connection_closed(self, event):
+        self._count('closed')
+
+    def pool_cleared(self, event):
+        self._count('pool_cleared')
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counters)
+        stats['in_use'] = stats.get('checked_out', 0) - stats.get(
+            'checked_in', 0
+        )
+        stats['open'] = stats.get('created', 0) - stats.get('closed', 0)
+        return stats
+
+
+_pool = PoolMonitor()
+_lock = threading.Lock()
+_last_failure: Dict[str, float] = {}
+
+
+def pool_stats() -> Dict[str, Any]:
+    return _pool.stats()
+
 
 @st.cache_resource
-def get_db_connection() -> MongoClient:
-    """Estabelece e retorna uma conexão com o cliente MongoDB."""
+def _connect() -> MongoClient:
+    client = MongoClient(st.secrets['MONGO_URI'], **client_options())
     try:
-        uri = st.secrets['MONGO_URI']
-        client = MongoClient(uri, server_api=ServerApi('1'))
         client.admin.command('ping')
-        return client
+    except Exception:
+        client.close()
+        raise
+    try:
+        ensure_indexes(get_database(client))
+    except PyMongoError as e:
+        st.warning(f'Não foi possível garantir os índices do MongoDB: {e}')
+    return client
+
+
+@st.cache_resource
+def _connect_async() -> AsyncMongoClient:
+    client = AsyncMongoClient(st.secrets['MONGO_URI'], **client_options())
+    try:
+        run(client.admin.command('ping'))
+    except Exception:
+        run(client.close())
+        raise
+    return client
+
+
+def _get_client(name: str, connect: Callable[[], Any]) -> Any:
+    """
+    Cliente em cache de `connect`. Uma falha não fica em cache: a próxima
+    chamada depois de RETRY_INTERVAL_SECONDS tenta conectar de novo.
+    """
+    with _lock:
+        failed_at = _last_failure.get(name)
+    if failed_at and time.monotonic() - failed_at < RETRY_INTERVAL_SECONDS:
+        return None
+    try:
+        client = connect()
     except Exception as e:
+        with _lock:
+            _last_failure[name] = time.monotonic()
         st.error(f'Erro ao conectar com o MongoDB: {e}')
         return None
+    with _lock:
+        _last_failure.pop(name, None)
+    return client
+
+
+def get_db_connection() -> MongoClient:
+    """Estabelece e retorna uma conexão com o cliente MongoDB."""
+    return _get_client('sync', _connect)
+
+
+def get_async_db_connection() -> AsyncMongoClient:
+    """
+    Cliente async do MongoDB, usado no loop de utils.aio para consultas
+    independentes em paralelo. Os índices ficam com get_db_connection.
+    """
+    return _get_client('async', _connect_async)
 
 
-def get_database(client: MongoClient) -> Database:
+def get_database(client: MongoClient | AsyncMongoClient) -> Database:
     """Retorna uma instância do banco de dados a partir de um cliente conectado."""
     if client:
         return client['DLPL']
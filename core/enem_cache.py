@@ -0,0 +1,130 @@
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict
+
+from cachetools import LRUCache
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.database import Database
+from pymongo.errors import PyMongoError
+
+from utils.enem import fetch_enem_scores, fetch_enem_scores_async
+
+ENEM_CACHE_COLLECTION = 'enem_cache'
+ENEM_CACHE_LRU_SIZE = 2048
+
+_lru = LRUCache(maxsize=ENEM_CACHE_LRU_SIZE)
+_lock = threading.Lock()
+_counters = Counter()
+
+
+def fetch_enem_scores_cached(
+    db: Database,
+    hash_token: str,
+    use_cache: bool = True,
+    on_wait: Callable[[int, float], None] | None = None,
+) -> Dict[str, Any] | None:
+    """
+    Busca os resultados do ENEM consultando antes o LRU do processo e a
+    coleção 'enem_cache'. Só chama o INEP em caso de falta; com
+    `use_cache=False` vai direto ao INEP e atualiza o cache. `on_wait` é
+    repassado a utils.enem.fetch_enem_scores.
+    """
+    if use_cache:
+        enem_data = _lru_get(hash_token)
+        if enem_data is not None:
+            return enem_data
+        try:
+            doc = db[ENEM_CACHE_COLLECTION].find_one({'_id': hash_token})
+        except PyMongoError:
+            doc = None
+        if doc:
+            return _mongo_hit(hash_token, doc)
+
+    _count_inep_call()
+    enem_data = fetch_enem_scores(hash_token, on_wait)
+    if enem_data:
+        _lru_put(hash_token, enem_data)
+        try:
+            db[ENEM_CACHE_COLLECTION].replace_one(
+                {'_id': hash_token}, _cache_doc(enem_data), upsert=True
+            )
+        except PyMongoError:
+            # O cache é opcional: uma falha ao gravar não deve travar a
+            # inscrição.
+            pass
+    return enem_data
+
+
+async def fetch_enem_scores_cached_async(
+    db: AsyncDatabase,
+    hash_token: str,
+    use_cache: bool = True,
+    on_wait: Callable[[int, float], None] | None = None,
+) -> Dict[str, Any] | None:
+    """Versão async de fetch_enem_scores_cached, sobre o cliente async."""
+    if use_cache:
+        enem_data = _lru_get(hash_token)
+        if enem_data is not None:
+            return enem_data
+        try:
+            doc = await db[ENEM_CACHE_COLLECTION].find_one({'_id': hash_token})
+        except PyMongoError:
+            doc = None
+        if doc:
+            return _mongo_hit(hash_token, doc)
+
+    _count_inep_call()
+    enem_data = await fetch_enem_scores_async(hash_token, on_wait)
+    if enem_data:
+        _lru_put(hash_token, enem_data)
+        try:
+            await db[ENEM_CACHE_COLLECTION].replace_one(
+                {'_id': hash_token}, _cache_doc(enem_data), upsert=True
+            )
+        except PyMongoError:
+            pass
+    return enem_data
+
+
+def _lru_get(hash_token: str) -> Dict[str, Any] | None:
+    with _lock:
+        enem_data = _lru.get(hash_token)
+        if enem_data is not None:
+            _counters['lru_hits'] += 1
+        return enem_data
+
+
+def _lru_put(hash_token: str, enem_data: Dict[str, Any]):
+    with _lock:
+        _lru[hash_token] = enem_data
+
+
+def _mongo_hit(hash_token: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+    with _lock:
+        _counters['mongo_hits'] += 1
+        _lru[hash_token] = doc['data']
+    return doc['data']
+
+
+def _count_inep_call():
+    with _lock:
+        _counters['inep_calls'] += 1
+
+
+def _cache_doc(enem_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {'data': enem_data, 'cached_at': datetime.now(timezone.utc)}
+
+
+def enem_cache_stats() -> Dict[str, Any]:
+    """Acertos do cache, chamadas ao INEP e chamadas economizadas."""
+    with _lock:
+        hits = _counters['lru_hits'] + _counters['mongo_hits']
+        total = hits + _counters['inep_calls']
+        return {
+            'lru_hits': _counters['lru_hits'],
+            'mongo_hits': _counters['mongo_hits'],
+            'inep_calls': _counters['inep_calls'],
+            'inep_calls_saved': hits,
+            'hit_ratio': hits / total if total else 0.0,
+        }
@@ -0,0 +1,174 @@
+from typing import Any, Dict, Iterator
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.database import Database
+
+from core.alunos import (CALOUROS_COLLECTION, CURSOS_COLLECTION,
+                         ensure_alunos_indexes)
+from core.crud import (ALUNO_PROJECTION, CALOURO_SORT, calouro_filter,
+                       enrollment_filter, turmas_filter)
+from core.ranking import ranking_pipeline
+from utils.names import normalize_name
+
+INDEXES = {
+    'inscricoes': [
+        {
+            'keys': [('token_enem', ASCENDING), ('semester', ASCENDING)],
+            'name': 'token_semester_unique',
+            'unique': True,
+        },
+        {
+            # Classificação por turma (core.ranking.ranking_pipeline).
+            'keys': [
+                ('semester', ASCENDING),
+                ('turma_escolhida', ASCENDING),
+                ('notas_relevantes.nota_predita', DESCENDING),
+                ('data_inscricao', ASCENDING),
+                ('token_enem', ASCENDING),
+            ],
+            'name': 'semester_turma_nota_token',
+        },
+    ],
+    'turma': [
+        {
+            'keys': [
+                ('semester', ASCENDING),
+                ('is_active', ASCENDING),
+                ('name', ASCENDING),
+            ],
+            'name': 'semester_active_name',
+        },
+    ],
+    'enem_cache': [
+        {
+            # Os resultados do ENEM não mudam durante um semestre.
+            'keys': [('cached_at', ASCENDING)],
+            'name': 'cached_at_ttl',
+            'expireAfterSeconds': 180 * 24 * 3600,
+        },
+    ],
+    CURSOS_COLLECTION: [
+        {
+            'keys': [('alunos_ativos.Matrícula', ASCENDING)],
+            'name': 'alunos_matricula',
+        },
+    ],
+    CALOUROS_COLLECTION: [
+        {
+            'keys': [
+                ('nome_normalizado', ASCENDING),
+                ('Matricula', DESCENDING),
+            ],
+            'name': 'nome_normalizado_matricula',
+        },
+    ],
+}
+# Índices substituídos por outros de INDEXES, removidos por ensure_indexes.
+OBSOLETE_INDEXES = {
+    'inscricoes': ['semester_turma_nota'],
+    CALOUROS_COLLECTION: ['nome_normalizado'],
+}
+
+
+def ensure_indexes(db: Database) -> list[str]:
+    """
+    Cria (se ainda não existirem) os índices usados pelas consultas de
+    core.crud e remove os de OBSOLETE_INDEXES. Retorna os nomes dos
+    índices garantidos.
+    """
+    for collection, names in OBSOLETE_INDEXES.items():
+        existing = db[collection].index_information()
+        for name in names:
+            if name in existing:
+                db[collection].drop_index(name)
+    ensured = []
+    for collection, specs in INDEXES.items():
+        for spec in specs:
+            options = {k: v for k, v in spec.items() if k != 'keys'}
+            ensured.append(
+                db[collection].create_index(spec['keys'], **options)
+            )
+    ensure_alunos_indexes(db)
+    return ensured
+
+
+def _explain_queries(
+    db: Database, sample: Dict[str, str]
+) -> Iterator[tuple[str, Dict[str, Any]]]:
+    """Gera o explain() de cada consulta feita por core.crud."""
+    matricula = sample['matricula']
+    semester = sample['semester']
+    filtro = enrollment_filter(sample['token'], semester)
+
+    yield 'find_student_by_matricula', db['alunos'].find(
+        {'Matricula': matricula}, ALUNO_PROJECTION
+    ).limit(1).explain()
+    yield 'find_student_by_matricula_in_cursos', db.command(
+        'aggregate',
+        CURSOS_COLLECTION,
+        pipeline=[
+            {'$match': {'alunos_ativos.Matrícula': matricula}},
+            {'$unwind': '$alunos_ativos'},
+            {'$match': {'alunos_ativos.Matrícula': matricula}},
+        ],
+        explain=True,
+    )
+    yield 'find_calouro_by_name', db[CALOUROS_COLLECTION].find(
+        calouro_filter(normalize_name(sample['nome']), matricula)
+    ).sort(CALOURO_SORT).limit(2).explain()
+    yield 'find_enrollment_by_token_and_semester', db['inscricoes'].find(
+        filtro
+    ).limit(1).explain()
+    yield 'get_configuracoes', db['config'].find({}).sort(
+        '_id', ASCENDING
+    ).limit(1).explain()
+    yield 'get_turmas', db['turma'].find(
+        turmas_filter(semester), {'_id': 0, 'name': 1}
+    ).explain()
+    yield 'ranking', db.command(
+        'aggregate',
+        'inscricoes',
+        pipeline=ranking_pipeline(semester),
+        explain=True,
+    )
+    yield 'save_enrollment', db.command(
+        {
+            'explain': {
+                'update': 'inscricoes',
+                'updates': [
+                    {
+                        'q': filtro,
+                        'u': {'$set': {'escolha': 'Cursar disciplina'}},
+                        'upsert': True,
+                    }
+                ],
+            },
+            'verbosity': 'queryPlanner',
+        }
+    )
+
+
+def _find_stages(plan: Any) -> Iterator[str]:
+    """Percorre um explain() e gera os estágios do plano vencedor."""
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for key, value in plan.items():
+            if key != 'rejectedPlans':
+                yield from _find_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _find_stages(item)
+
+
+def audit_query_plans(
+    db: Database, sample: Dict[str, str]
+) -> Dict[str, list[str]]:
+    """
+    Executa explain() em todas as consultas de core.crud e retorna, para
+    cada uma, os estágios do plano escolhido pelo MongoDB.
+    """
+    return {
+        name: list(_find_stages(plan))
+        for name, plan in _explain_queries(db, sample)
+    }
@@ -0,0 +1,236 @@
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict
+
+from cachetools import TTLCache
+from pymongo.database import Database
+
+from core.ranking import ESCOLHA_DISPENSA
+
+OCCUPANCY_FIELD = 'occupancy'
+OCCUPANCY_KEYS = ('total', 'cursar', 'dispensa')
+OCCUPANCY_TTL_SECONDS = 10
+RECONCILE_ATTEMPTS = 3
+
+_cache = TTLCache(maxsize=16, ttl=OCCUPANCY_TTL_SECONDS)
+_lock = threading.Lock()
+
+
+class TurmaFullError(Exception):
+    """A turma escolhida já tem todas as vagas ocupadas."""
+
+    def __init__(self, turma: str):
+        super().__init__(f"A turma '{turma}' não tem mais vagas.")
+        self.turma = turma
+
+
+def _bucket(escolha: str) -> str:
+    return 'dispensa' if escolha == ESCOLHA_DISPENSA else 'cursar'
+
+
+def _turma_filter(semester: str, turma: str) -> Dict[str, Any]:
+    return {'semester': semester, 'name': turma}
+
+
+def occupancy_delta(
+    previous: Dict[str, Any] | None, current: Dict[str, Any]
+) -> Dict[str, Counter]:
+    """
+    Variação dos contadores de cada turma quando uma inscrição passa de
+    `previous` (None se é nova) para `current`.
+    """
+    delta = defaultdict(Counter)
+    if previous:
+        old = delta[previous['turma_escolhida']]
+        old['total'] -= 1
+        old[_bucket(previous['escolha'])] -= 1
+    new = delta[current['turma_escolhida']]
+    new['total'] += 1
+    new[_bucket(current['escolha'])] += 1
+    return {
+        turma: Counter({k: v for k, v in counts.items() if v})
+        for turma, counts in delta.items()
+        if any(counts.values())
+    }
+
+
+def reserve_seat(
+    db: Database,
+    semester: str,
+    previous: Dict[str, Any] | None,
+    current: Dict[str, Any],
+) -> Dict[str, Counter]:
+    """
+    Ocupa, antes de gravar a inscrição, a vaga que `current` passa a usar
+    na turma, se ela tiver 'capacity'. O $inc só é aplicado enquanto
+    'cursar' estiver abaixo da capacidade, então duas sessões não disputam
+    a última vaga. Levanta TurmaFullError se não houver vaga; devolve o
+    que foi reservado, para descontar em apply_occupancy.
+    """
+    turma = current['turma_escolhida']
+    increments = occupancy_delta(previous, current).get(turma, Counter())
+    if increments.get('cursar', 0) <= 0:
+        return {}
+    inc = {f'{OCCUPANCY_FIELD}.{key}': n for key, n in increments.items()}
+    cursar = f'${OCCUPANCY_FIELD}.cursar'
+    result = db['turma'].update_one(
+        {
+            **_turma_filter(semester, turma),
+            '$or': [
+                {'capacity': None},
+                {'$expr': {'$lt': [{'$ifNull': [cursar, 0]}, '$capacity']}},
+            ],
+        },
+        {'$inc': inc},
+    )
+    if result.matched_count == 0:
+        invalidate_occupancy(semester)
+        raise TurmaFullError(turma)
+    return {turma: increments}
+
+
+def apply_occupancy(
+    db: Database,
+    semester: str,
+    previous: Dict[str, Any] | None,
+    current: Dict[str, Any] | None,
+    reserved: Dict[str, Counter] | None = None,
+):
+    """
+    Aplica com $inc a variação dos contadores entre `previous` e `current`,
+    descontando o que reserve_seat já aplicou (ou devolvendo a reserva, se
+    a inscrição acabou não mudando de turma).
+    """
+    delta = occupancy_delta(previous, current) if current else {}
+    changed = False
+    # No máximo duas turmas (a anterior e a nova): um update_one por turma.
+    for turma in set(delta) | set(reserved or {}):
+        counts = Counter(delta.get(turma, {}))
+        counts.subtract((reserved or {}).get(turma, {}))
+        inc = {
+            f'{OCCUPANCY_FIELD}.{key}': n for key, n in counts.items() if n
+        }
+        if inc:
+            db['turma'].update_one(
+                _turma_filter(semester, turma), {'$inc': inc}
+            )
+            changed = True
+    if changed:
+        invalidate_occupancy(semester)
+
+
+def get_occupancy(db: Database, semester: str) -> Dict[str, Dict[str, Any]]:
+    """Contadores e capacidade ('capacity', opcional) das turmas ativas."""
+    occupancy = {}
+    for doc in db['turma'].find(
+        {'semester': semester, 'is_active': True},
+        {'_id': 0, 'name': 1, 'capacity': 1, OCCUPANCY_FIELD: 1},
+    ):
+        counts = doc.get(OCCUPANCY_FIELD) or {}
+        occupancy[doc['name']] = {
+            **{key: counts.get(key, 0) for key in OCCUPANCY_KEYS},
+            'capacity': doc.get('capacity'),
+        }
+    return occupancy
+
+
+def get_occupancy_cached(
+    db: Database, semester: str
+) -> Dict[str, Dict[str, Any]]:
+    """
+    get_occupancy com cache de OCCUPANCY_TTL_SECONDS no processo. Serve
+    só para exibição: a capacidade é garantida por reserve_seat.
+    """
+    with _lock:
+        occupancy = _cache.get(semester)
+    if occupancy is None:
+        occupancy = get_occupancy(db, semester)
+        with _lock:
+            _cache[semester] = occupancy
+    return occupancy
+
+
+def invalidate_occupancy(semester: str | None = None):
+    with _lock:
+        if semester is None:
+            _cache.clear()
+        else:
+            _cache.pop(semester, None)
+
+
+def count_enrollments(db: Database, semester: str) -> Dict[str, Counter]:
+    """Contadores recalculados do zero a partir de 'inscricoes'."""
+    counts = defaultdict(Counter)
+    pipeline = [
+        {'$match': {'semester': semester}},
+        {
+            '$group': {
+                '_id': {'turma': '$turma_escolhida', 'escolha': '$escolha'},
+                'n': {'$sum': 1},
+            }
+        },
+    ]
+    for doc in db['inscricoes'].aggregate(pipeline):
+        turma = counts[doc['_id']['turma']]
+        turma['total'] += doc['n']
+        turma[_bucket(doc['_id']['escolha'])] += doc['n']
+    return counts
+
+
+def reconcile_occupancy(
+    db: Database, semester: str, dry_run: bool = False
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Recalcula os contadores das turmas do semestre e corrige os que
+    divergirem. Os contadores gravados são lidos antes da contagem, e a
+    correção só é gravada se eles não mudaram desde a leitura: uma
+    inscrição salva no meio (cujo $inc muda os contadores) faz a turma ser
+    relida e recontada, até RECONCILE_ATTEMPTS vezes. Resta a janela curta
+    entre gravar uma inscrição e aplicar o seu $inc em save_enrollment.
+    Devolve, por turma corrigida, os valores gravados e os encontrados.
+    """
+    fixed = {}
+    pending = None
+    for _ in range(RECONCILE_ATTEMPTS):
+        turmas = db['turma'].find(
+            {'semester': semester}, {'_id': 0, 'name': 1, OCCUPANCY_FIELD: 1}
+        )
+        stored = {
+            doc['name']: doc.get(OCCUPANCY_FIELD) or {}
+            for doc in turmas
+            if pending is None or doc['name'] in pending
+        }
+        expected = count_enrollments(db, semester)
+        pending = set()
+        for turma, current in stored.items():
+            values = {key: expected[turma][key] for key in OCCUPANCY_KEYS}
+            found = {key: current.get(key) for key in OCCUPANCY_KEYS}
+            if found == values:
+                continue
+            fixed[turma] = {'expected': values, 'found': found}
+            if dry_run:
+                continue
+            result = db['turma'].update_one(
+                {
+                    **_turma_filter(semester, turma),
+                    **{
+                        f'{OCCUPANCY_FIELD}.{key}': value
+                        for key, value in found.items()
+                    },
+                },
+                {
+                    '$set': {
+                        f'{OCCUPANCY_FIELD}.{key}': value
+                        for key, value in values.items()
+                    }
+                },
+            )
+            if result.matched_count == 0:
+                pending.add(turma)
+        if not pending:
+            break
+    for turma in pending or ():
+        fixed[turma]['unresolved'] = True
+    if fixed and not dry_run:
+        invalidate_occupancy(semester)
+    return fixed
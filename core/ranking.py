@@ -0,0 +1,379 @@
+import bisect
+import threading
+import time
+from typing import Any, Dict, Iterator
+
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.database import Database
+
+RANKING_TTL_SECONDS = 300
+RANKING_VERSION_CHECK_SECONDS = 10
+# Incrementado no documento de 'config' quando as notas mudam fora do app.
+RANKING_VERSION_FIELD = 'rankingVersion'
+ESCOLHA_DISPENSA = 'Dispensa de disciplina'
+NOTA_FIELD = 'notas_relevantes.nota_predita'
+
+
+def ranking_pipeline(semester: str) -> list[Dict[str, Any]]:
+    """
+    Inscrições com nota predita do semestre, já na ordem de classificação
+    de cada turma. $match e $sort são cobertos pelo índice
+    'semester_turma_nota_token'.
+    """
+    return [
+        {'$match': {'semester': semester, NOTA_FIELD: {'$type': 'number'}}},
+        {
+            '$sort': {
+                'turma_escolhida': ASCENDING,
+                NOTA_FIELD: -1,
+                'data_inscricao': ASCENDING,
+                # Desempate igual ao de _sort_key, que os bisect exigem.
+                'token_enem': ASCENDING,
+            }
+        },
+        {
+            '$project': {
+                '_id': 0,
+                'token_enem': 1,
+                'Nome': 1,
+                'Matricula': 1,
+                'turma_escolhida': 1,
+                'escolha': 1,
+                'nota_predita': f'${NOTA_FIELD}',
+                'data_inscricao': 1,
+            }
+        },
+    ]
+
+
+def _sort_key(entry: Dict[str, Any]) -> tuple:
+    # Maior nota primeiro; em caso de empate, quem se inscreveu antes.
+    return (
+        -entry['nota_predita'],
+        entry.get('data_inscricao') or '',
+        entry['token_enem'],
+    )
+
+
+class _Semester:
+    __slots__ = ('turmas', 'entries', 'loaded_at')
+
+    def __init__(self):
+        self.turmas: Dict[str, list[tuple]] = {}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.loaded_at = time.monotonic()
+
+    def add(self, entry: Dict[str, Any]):
+        self.entries[entry['token_enem']] = entry
+        bisect.insort(
+            self.turmas.setdefault(entry['turma_escolhida'], []),
+            _sort_key(entry),
+        )
+
+    def remove(self, token: str) -> Dict[str, Any] | None:
+        entry = self.entries.pop(token, None)
+        if entry is not None:
+            keys = self.turmas[entry['turma_escolhida']]
+            del keys[bisect.bisect_left(keys, _sort_key(entry))]
+            if not keys:
+                del self.turmas[entry['turma_escolhida']]
+        return entry
+
+
+class RankingBoard:
+    """
+    Classificação por (semestre, turma) mantida em memória. Cada semestre é
+    carregado com uma única agregação indexada e depois atualizado a cada
+    inscrição salva neste processo. Alterações feitas por outros processos
+    aparecem na recarga seguinte, a cada `ttl` segundos, ou em até
+    `version_check_interval` segundos depois de bump_ranking_version; a
+    recarga roda em segundo plano, uma por semestre, e a classificação
+    anterior continua sendo servida até ela terminar.
+    """
+
+    def __init__(
+        self,
+        ttl: float = RANKING_TTL_SECONDS,
+        version_check_interval: float = RANKING_VERSION_CHECK_SECONDS,
+    ):
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self._version = None
+        self._version_checked_at = float('-inf')
+        self._lock = threading.Lock()
+        self._semesters: Dict[str, _Semester] = {}
+        self._loading: Dict[str, threading.Event] = {}
+        # Inscrições salvas durante uma recarga, reaplicadas ao fim dela.
+        self._pending: Dict[str, list[Dict[str, Any]]] = {}
+        self._epoch = 0
+
+    def _check_version(self, db: Database):
+        """
+        Consulta RANKING_VERSION_FIELD no máximo uma vez por intervalo. Se
+        mudou, todos os semestres vencem e recargas em andamento, que leram
+        as notas antigas, são descartadas.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._version_checked_at < self.version_check_interval:
+                return
+            first_check = self._version_checked_at == float('-inf')
+            self._version_checked_at = now
+        version = fetch_ranking_version(db)
+        with self._lock:
+            if version != self._version and not first_check:
+                self._epoch += 1
+                for board in self._semesters.values():
+                    board.loaded_at = float('-inf')
+            self._version = version
+
+    def _get(self, db: Database, semester: str) -> _Semester:
+        self._check_version(db)
+        with self._lock:
+            board = self._semesters.get(semester)
+            if board and time.monotonic() - board.loaded_at < self.ttl:
+                return board
+            loading = self._loading.get(semester)
+            leader = loading is None
+            if leader:
+                loading = self._loading[semester] = threading.Event()
+                self._pending[semester] = []
+        if board is not None:
+            if leader:
+                threading.Thread(
+                    target=self._load,
+                    args=(db, semester, loading),
+                    daemon=True,
+                ).start()
+            return board
+        if leader:
+            self._load(db, semester, loading)
+        else:
+            loading.wait()
+        # Se a carga falhou ou foi descartada por invalidate, tenta de novo.
+        return self._get(db, semester)
+
+    def _load(self, db: Database, semester: str, loading: threading.Event):
+        with self._lock:
+            epoch = self._epoch
+        try:
+            board = _Semester()
+            for doc in db['inscricoes'].aggregate(ranking_pipeline(semester)):
+                # O cursor já vem ordenado: basta anexar ao fim de cada turma.
+                board.entries[doc['token_enem']] = doc
+                board.turmas.setdefault(doc['turma_escolhida'], []).append(
+                    _sort_key(doc)
+                )
+            with self._lock:
+                if epoch == self._epoch:
+                    for enrollment in self._pending.get(semester, []):
+                        _apply(board, enrollment)
+                    self._semesters[semester] = board
+        finally:
+            with self._lock:
+                self._loading.pop(semester, None)
+                self._pending.pop(semester, None)
+            loading.set()
+
+    def record(self, enrollment: Dict[str, Any]):
+        """
+        Aplica uma inscrição recém-salva. Em atualizações só turma e
+        escolha mudam, como em core.crud.save_enrollment.
+        """
+        with self._lock:
+            semester = enrollment['semester']
+            if semester in self._pending:
+                self._pending[semester].append(enrollment)
+            board = self._semesters.get(semester)
+            if board is not None:
+                _apply(board, enrollment)
+
+    def turmas(self, db: Database, semester: str) -> Dict[str, int]:
+        """Número de inscrições classificadas em cada turma."""
+        board = self._get(db, semester)
+        with self._lock:
+            return {name: len(keys) for name, keys in board.turmas.items()}
+
+    def ranking(
+        self,
+        db: Database,
+        semester: str,
+        turma: str,
+        cutoff: float,
+        capacity: int | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> list[Dict[str, Any]]:
+        """
+        Lista classificada da turma. Quem pediu dispensa com nota igual ou
+        acima de `cutoff` fica com situação 'dispensa' e não ocupa vaga; os
+        demais ocupam as `capacity` vagas em ordem ('vaga') e o restante
+        fica em 'espera'. Sem `capacity`, todos recebem vaga.
+        """
+        board = self._get(db, semester)
+        with self._lock:
+            keys = board.turmas.get(turma, [])
+            end = len(keys) if limit is None else offset + limit
+            rows = []
+            for position, item in enumerate(
+                _classify(board, keys, cutoff, capacity), 1
+            ):
+                if position > end:
+                    break
+                if position > offset:
+                    rows.append(item)
+            return rows
+
+    def position(
+        self,
+        db: Database,
+        semester: str,
+        token: str,
+        cutoff: float,
+        capacity: int | None = None,
+    ) -> Dict[str, Any] | None:
+        """Classificação e situação de uma única inscrição."""
+        board = self._get(db, semester)
+        with self._lock:
+            entry = board.entries.get(token)
+            if entry is None:
+                return None
+            keys = board.turmas[entry['turma_escolhida']]
+            target = bisect.bisect_left(keys, _sort_key(entry)) + 1
+            for position, item in enumerate(
+                _classify(board, keys, cutoff, capacity), 1
+            ):
+                if position == target:
+                    return item
+        return None
+
+    def invalidate(self, semester: str | None = None):
+        with self._lock:
+            # Recargas em andamento leram o banco antes da invalidação.
+            self._epoch += 1
+            if semester is None:
+                self._semesters.clear()
+            else:
+                self._semesters.pop(semester, None)
+
+
+def _apply(board: _Semester, enrollment: Dict[str, Any]):
+    old = board.remove(enrollment['token_enem'])
+    if old is not None:
+        entry = {
+            **old,
+            'turma_escolhida': enrollment['turma_escolhida'],
+            'escolha': enrollment['escolha'],
+        }
+    else:
+        nota = enrollment.get('notas_relevantes', {}).get('nota_predita')
+        if not isinstance(nota, (int, float)):
+            return
+        entry = {
+            'token_enem': enrollment['token_enem'],
+            'Nome': enrollment.get('Nome'),
+            'Matricula': enrollment.get('Matricula'),
+            'turma_escolhida': enrollment['turma_escolhida'],
+            'escolha': enrollment['escolha'],
+            'nota_predita': nota,
+            'data_inscricao': enrollment.get('data_inscricao'),
+        }
+    board.add(entry)
+
+
+def _classify(
+    board: _Semester, keys: list[tuple], cutoff: float, capacity: int | None
+) -> Iterator[Dict[str, Any]]:
+    seats = 0
+    for position, key in enumerate(keys, 1):
+        entry = board.entries[key[2]]
+        dispensa = entry['escolha'] == ESCOLHA_DISPENSA
+        if dispensa and entry['nota_predita'] >= cutoff:
+            status = 'dispensa'
+        elif capacity is None or seats < capacity:
+            seats += 1
+            status = 'vaga'
+        else:
+            status = 'espera'
+        yield {
+            'classificacao': position,
+            'situacao': status,
+            'Nome': entry.get('Nome'),
+            'Matricula': entry.get('Matricula'),
+            'escolha': entry['escolha'],
+            'nota_predita': entry['nota_predita'],
+            'token_enem': entry['token_enem'],
+        }
+
+
+_board = RankingBoard()
+
+
+def fetch_ranking_version(db: Database) -> Any:
+    doc = db['config'].find_one(
+        {}, {RANKING_VERSION_FIELD: 1}, sort=[('_id', ASCENDING)]
+    )
+    return doc.get(RANKING_VERSION_FIELD) if doc else None
+
+
+def bump_ranking_version(db: Database) -> int:
+    """
+    Incrementa a versão da classificação, fazendo todos os processos
+    recarregarem os semestres em até RANKING_VERSION_CHECK_SECONDS.
+    """
+    doc = db['config'].find_one_and_update(
+        {},
+        {'$inc': {RANKING_VERSION_FIELD: 1}},
+        sort=[('_id', ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc.get(RANKING_VERSION_FIELD) if doc else 0
+
+
+def turma_capacities(db: Database, semester: str) -> Dict[str, int | None]:
+    """Vagas de cada turma ativa, pelo campo opcional 'capacity'."""
+    return {
+        doc['name']: doc.get('capacity')
+        for doc in db['turma'].find(
+            {'semester': semester, 'is_active': True},
+            {'_id': 0, 'name': 1, 'capacity': 1},
+        )
+    }
+
+
+def get_turma_ranking(
+    db: Database,
+    semester: str,
+    turma: str,
+    cutoff: float,
+    capacity: int | None = None,
+    offset: int = 0,
+    limit: int | None = None,
+) -> list[Dict[str, Any]]:
+    """Lista classificada de uma turma (ver RankingBoard.ranking)."""
+    return _board.ranking(
+        db, semester, turma, cutoff, capacity, offset, limit
+    )
+
+
+def get_ranking_position(
+    db: Database,
+    semester: str,
+    token: str,
+    cutoff: float,
+    capacity: int | None = None,
+) -> Dict[str, Any] | None:
+    return _board.position(db, semester, token, cutoff, capacity)
+
+
+def get_ranked_turmas(db: Database, semester: str) -> Dict[str, int]:
+    return _board.turmas(db, semester)
+
+
+def record_enrollment(enrollment: Dict[str, Any]):
+    """Atualiza a classificação em memória com uma inscrição salva."""
+    _board.record(enrollment)
+
+
+def invalidate_ranking(semester: str | None = None):
+    _board.invalidate(semester)
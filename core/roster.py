@@ -0,0 +1,304 @@
+import csv
+import time
+from collections import defaultdict
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator
+from uuid import uuid4
+
+from pymongo import UpdateOne
+from pymongo.database import Database
+
+from core.alunos import (CALOUROS_COLLECTION, CURSOS_COLLECTION,
+                         sync_curso_alunos)
+from utils.names import normalize_name
+
+# Cabeçalhos da exportação de alunos ativos do SIGAA.
+SIGAA_COLUMNS = {
+    'matricula': 'Matrícula',
+    'nome': 'Nome',
+    'curso': 'Curso',
+    'centro': 'Centro',
+}
+
+
+def read_roster(
+    path: Path,
+    columns: Dict[str, str] = SIGAA_COLUMNS,
+    delimiter: str = ';',
+    encoding: str = 'utf-8-sig',
+    required: tuple[str, ...] = ('matricula', 'curso'),
+    optional: tuple[str, ...] = (),
+) -> Iterator[Dict[str, str]]:
+    """
+    Lê a exportação do SIGAA (CSV ou XLSX) linha a linha, sem carregar o
+    arquivo inteiro. Gera dicionários com as chaves de `columns`, pulando
+    linhas em branco e linhas sem algum dos campos `required`. Colunas das
+    chaves `optional` podem faltar na planilha; seus campos ficam vazios.
+    """
+    if path.suffix.lower() in ('.xlsx', '.xlsm'):
+        rows = _xlsx_rows(path)
+    else:
+        rows = _csv_rows(path, delimiter, encoding)
+    header = next(rows, None)
+    if header is None:
+        raise ValueError('Planilha vazia.')
+    header = [str(cell or '').strip() for cell in header]
+    positions = {}
+    for key, name in columns.items():
+        if name in header:
+            positions[key] = header.index(name)
+        elif key not in optional:
+            raise ValueError(f'Coluna ausente na planilha: {name!r}')
+    missing = dict.fromkeys(columns.keys() - positions.keys(), '')
+    width = max(positions.values()) + 1
+    for row in rows:
+        if not any(cell not in (None, '') for cell in row):
+            continue
+        # Linhas curtas (células finais vazias omitidas) são completadas.
+        row = [*row, *[None] * (width - len(row))]
+        aluno = {
+            key: str(row[i]).strip() if row[i] is not None else ''
+            for key, i in positions.items()
+        }
+        aluno.update(missing)
+        if all(aluno[key] for key in required):
+            yield aluno
+
+
+def _csv_rows(path: Path, delimiter: str, encoding: str) -> Iterator[list]:
+    with open(path, newline='', encoding=encoding) as f:
+        yield from csv.reader(f, delimiter=delimiter)
+
+
+def _xlsx_rows(path: Path) -> Iterator[tuple]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError(
+            'A leitura de XLSX requer o pacote openpyxl.'
+        ) from None
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def current_roster(db: Database) -> Dict[str, Dict[str, Any]]:
+    """Cadastro atual: curso -> {'_id', 'alunos': {matrícula: nome}}."""
+    roster = {}
+    for doc in db[CURSOS_COLLECTION].find(
+        {},
+        {'Nome': 1, 'alunos_ativos.Matrícula': 1, 'alunos_ativos.Aluno': 1},
+    ):
+        roster[doc['Nome']] = {
+            '_id': doc['_id'],
+            'alunos': {
+                aluno['Matrícula']: aluno.get('Aluno')
+                for aluno in doc.get('alunos_ativos', [])
+            },
+        }
+    return roster
+
+
+class RosterImport:
+    """
+    Compara a exportação do SIGAA, lida em fluxo, com o cadastro atual de
+    'cursos.ufpb' e grava só as diferenças em lotes de `batch_size`
+    operações. A memória fica limitada às matrículas, nunca às linhas do
+    arquivo.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        batch_size: int = 1000,
+        dry_run: bool = False,
+        prune_missing: bool = False,
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.prune_missing = prune_missing
+        self.counts = defaultdict(int)
+        self.timings = defaultdict(float)
+        self._operations: list[UpdateOne] = []
+        self._touched: set[str] = set()
+
+    def run(self, alunos: Iterator[Dict[str, str]]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        roster = current_roster(self.db)
+        self.timings['load'] = time.perf_counter() - start
+
+        seen: Dict[str, set[str]] = defaultdict(set)
+        pending: Dict[str, list] = defaultdict(list)
+        for aluno in alunos:
+            self.counts['rows'] += 1
+            curso, matricula = aluno['curso'], aluno['matricula']
+            if matricula in seen[curso]:
+                continue
+            seen[curso].add(matricula)
+            existing = roster.get(curso, {}).get('alunos', {})
+            if matricula not in existing:
+                pending[curso].append(aluno)
+                if len(pending[curso]) >= self.batch_size:
+                    self._push(curso, pending.pop(curso))
+            elif existing[matricula] != aluno['nome']:
+                self._rename(curso, aluno)
+        for curso, novos in pending.items():
+            self._push(curso, novos)
+
+        for curso, atual in roster.items():
+            # Cursos ausentes do arquivo só são esvaziados com
+            # prune_missing, para que uma exportação parcial não apague o
+            # resto do cadastro.
+            if curso not in seen and not self.prune_missing:
+                continue
+            removed = [m for m in atual['alunos'] if m not in seen[curso]]
+            for i in range(0, len(removed), self.batch_size):
+                self._pull(curso, removed[i:i + self.batch_size])
+        self._flush()
+        self.timings['diff'] = (
+            time.perf_counter() - start - self.timings['load']
+            - self.timings['write']
+        )
+
+        if not self.dry_run:
+            sync_start = time.perf_counter()
+            ids = self.db[CURSOS_COLLECTION].find(
+                {'Nome': {'$in': sorted(self._touched)}}, {'_id': 1}
+            )
+            for doc in ids:
+                sync_curso_alunos(self.db, doc['_id'])
+            self.timings['sync'] = time.perf_counter() - sync_start
+        self.counts['courses'] = len(self._touched)
+        return {'counts': dict(self.counts), 'timings': dict(self.timings)}
+
+    def _push(self, curso: str, novos: list[Dict[str, str]]):
+        self.counts['added'] += len(novos)
+        self._queue(
+            UpdateOne(
+                {'Nome': curso},
+                {
+                    '$setOnInsert': {'Centro': novos[0]['centro']},
+                    '$push': {
+                        'alunos_ativos': {
+                            '$each': [
+                                {
+                                    'Matrícula': a['matricula'],
+                                    'Aluno': a['nome'],
+                                    'nome_normalizado': normalize_name(
+                                        a['nome']
+                                    ),
+                                }
+                                for a in novos
+                            ]
+                        }
+                    },
+                },
+                upsert=True,
+            ),
+            curso,
+        )
+
+    def _pull(self, curso: str, matriculas: list[str]):
+        self.counts['removed'] += len(matriculas)
+        self._queue(
+            UpdateOne(
+                {'Nome': curso},
+                {
+                    '$pull': {
+                        'alunos_ativos': {'Matrícula': {'$in': matriculas}}
+                    }
+                },
+            ),
+            curso,
+        )
+
+    def _rename(self, curso: str, aluno: Dict[str, str]):
+        self.counts['renamed'] += 1
+        matricula = aluno['matricula']
+        self._queue(
+            UpdateOne(
+                {'Nome': curso, 'alunos_ativos.Matrícula': matricula},
+                {
+                    '$set': {
+                        'alunos_ativos.$.Aluno': aluno['nome'],
+                        'alunos_ativos.$.nome_normalizado': normalize_name(
+                            aluno['nome']
+                        ),
+                    }
+                },
+            ),
+            curso,
+        )
+
+    def _queue(self, operation: UpdateOne, curso: str):
+        self._touched.add(curso)
+        self._operations.append(operation)
+        if len(self._operations) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._operations:
+            return
+        start = time.perf_counter()
+        if not self.dry_run:
+            # Em ordem: o $push que cria um curso vem antes dos demais.
+            self.db[CURSOS_COLLECTION].bulk_write(self._operations)
+        self.counts['batches'] += 1
+        self._operations = []
+        self.timings['write'] += time.perf_counter() - start
+
+
+def import_roster(
+    db: Database,
+    alunos: Iterator[Dict[str, str]],
+    batch_size: int = 1000,
+    dry_run: bool = False,
+    prune_missing: bool = False,
+) -> Dict[str, Any]:
+    """
+    Aplica em 'cursos.ufpb' as entradas e saídas de alunos da exportação do
+    SIGAA e sincroniza 'alunos' nos cursos alterados. Devolve contagens e
+    tempos de cada fase.
+    """
+    return RosterImport(db, batch_size, dry_run, prune_missing).run(alunos)
+
+
+def import_calouros(
+    db: Database, calouros: Iterator[Dict[str, str]], batch_size: int = 1000
+) -> int:
+    """
+    Substitui a lista de ingressantes pela de `calouros`, já com o nome
+    normalizado e, quando houver, a matrícula. A lista anterior só é
+    apagada depois que a nova estiver gravada; se a importação falhar ou
+    não tiver nenhum ingressante, ela fica intacta e o que já foi gravado
+    da nova é removido. Retorna o total importado.
+    """
+    import_id = uuid4().hex
+    total = 0
+    try:
+        while batch := list(islice(calouros, batch_size)):
+            db[CALOUROS_COLLECTION].insert_many(
+                {
+                    'Nome': calouro['nome'],
+                    'Matricula': calouro.get('matricula') or None,
+                    'nome_normalizado': normalize_name(calouro['nome']),
+                    'Curso': calouro.get('curso') or 'A ser confirmado',
+                    'Centro': calouro.get('centro'),
+                    'import_id': import_id,
+                }
+                for calouro in batch
+            )
+            total += len(batch)
+        if total == 0:
+            raise ValueError(
+                'Nenhum ingressante no arquivo; a lista atual foi mantida.'
+            )
+    except BaseException:
+        db[CALOUROS_COLLECTION].delete_many({'import_id': import_id})
+        raise
+    db[CALOUROS_COLLECTION].delete_many({'import_id': {'$ne': import_id}})
+    return total
@@ -0,0 +1,145 @@
+import time
+from typing import Any, Dict, Iterator
+
+import numpy as np
+import pandas as pd
+from pymongo import ASCENDING, UpdateOne
+from pymongo.database import Database
+
+from core.ranking import bump_ranking_version
+from utils.enem import coefficients_version
+
+VERSION_FIELD = 'notas_relevantes.versao_coeficientes'
+SCORES_PROJECTION = {
+    'notas_relevantes.nota_redacao': 1,
+    'notas_relevantes.nota_linguagens': 1,
+    'notas_relevantes.nota_predita': 1,
+    'notas_relevantes.versao_coeficientes': 1,
+}
+
+
+def _numeric(values: pd.Series) -> pd.Series:
+    """
+    Converte notas gravadas como texto ('598,7') ou número. 'N/A' vale 0,
+    como em parse_relevant_scores; qualquer outro valor inválido vira NaN.
+    """
+    text = values.astype('string').str.replace(',', '.', regex=False)
+    numbers = pd.to_numeric(text, errors='coerce')
+    return numbers.mask(values.isna() | (text == 'N/A'), 0.0)
+
+
+def predict_scores(
+    frame: pd.DataFrame, coefficients: Dict[str, float]
+) -> np.ndarray:
+    """Versão vetorizada do cálculo da nota predita de parse_relevant_scores."""
+    linguagens = _numeric(frame['nota_linguagens']).to_numpy(dtype=float)
+    redacao = _numeric(frame['nota_redacao']).to_numpy(dtype=float)
+    raw = (
+        coefficients['base']
+        + coefficients['linguagens'] * linguagens
+        + coefficients['redacao'] * redacao
+    )
+    # np.round arredonda multiplicando por 100 e erra casos de meio como
+    # 6.835; round() do Python, usado no cálculo por aluno, não.
+    return np.fromiter(
+        (round(value, 2) for value in raw.tolist()), float, len(raw)
+    )
+
+
+def _frame(docs: list[Dict[str, Any]]) -> pd.DataFrame:
+    notas = [doc.get('notas_relevantes') or {} for doc in docs]
+    stored = pd.Series([n.get('nota_predita') for n in notas], dtype=object)
+    return pd.DataFrame(
+        {
+            '_id': [doc['_id'] for doc in docs],
+            'nota_linguagens': [n.get('nota_linguagens') for n in notas],
+            'nota_redacao': [n.get('nota_redacao') for n in notas],
+            'nota_predita': pd.to_numeric(stored, errors='coerce'),
+            'versao': [n.get('versao_coeficientes') for n in notas],
+        }
+    )
+
+
+def changed_scores(
+    docs: list[Dict[str, Any]], coefficients: Dict[str, float]
+) -> Iterator[tuple[Any, float]]:
+    """
+    (_id, nova nota) das inscrições cuja nota ou versão de coeficientes
+    difere do recálculo. Inscrições com notas ilegíveis são ignoradas.
+    """
+    frame = _frame(docs)
+    predicted = predict_scores(frame, coefficients)
+    version = coefficients_version(coefficients)
+    stored = frame['nota_predita'].to_numpy(dtype=float)
+    changed = ~np.isnan(predicted) & (
+        (frame['versao'].to_numpy() != version)
+        | np.isnan(stored)
+        | (predicted != stored)
+    )
+    ids = frame['_id'].to_numpy()
+    for i in np.flatnonzero(changed):
+        yield ids[i], float(predicted[i])
+
+
+def recompute_predicted_scores(
+    db: Database,
+    semester: str,
+    coefficients: Dict[str, float],
+    batch_size: int = 5000,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Recalcula a nota predita de todas as inscrições do semestre com
+    `coefficients`, em lotes de `batch_size` documentos. Só as inscrições
+    que mudaram são gravadas, junto com a versão dos coeficientes. Se algo
+    foi gravado, incrementa a versão da classificação para que os
+    servidores do app a recarreguem.
+    """
+    version = coefficients_version(coefficients)
+    cursor = (
+        db['inscricoes']
+        .find({'semester': semester}, SCORES_PROJECTION)
+        .sort('_id', ASCENDING)
+        .batch_size(batch_size)
+    )
+    stats = {'version': version, 'scanned': 0, 'changed': 0, 'written': 0}
+    start = time.perf_counter()
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) == batch_size:
+            _apply(db, batch, coefficients, version, dry_run, stats)
+            batch = []
+    if batch:
+        _apply(db, batch, coefficients, version, dry_run, stats)
+    if stats['written']:
+        bump_ranking_version(db)
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+
+def _apply(
+    db: Database,
+    docs: list[Dict[str, Any]],
+    coefficients: Dict[str, float],
+    version: str,
+    dry_run: bool,
+    stats: Dict[str, Any],
+):
+    operations = [
+        UpdateOne(
+            {'_id': _id},
+            {
+                '$set': {
+                    'notas_relevantes.nota_predita': score,
+                    VERSION_FIELD: version,
+                }
+            },
+        )
+        for _id, score in changed_scores(docs, coefficients)
+    ]
+    stats['scanned'] += len(docs)
+    stats['changed'] += len(operations)
+    if operations and not dry_run:
+        result = db['inscricoes'].bulk_write(operations, ordered=False)
+        stats['written'] += result.modified_count
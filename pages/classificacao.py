@@ -0,0 +1,88 @@
+import hmac
+import time
+
+import pandas as pd
+import streamlit as st
+
+from core.cache import get_configuracoes_cached
+from core.database import get_database, get_db_connection
+from core.ranking import (get_ranked_turmas, get_turma_ranking,
+                          invalidate_ranking, turma_capacities)
+
+SITUACOES = {'vaga': 'Vaga', 'dispensa': 'Dispensa', 'espera': 'Espera'}
+
+
+def require_admin():
+    """Bloqueia a página para quem não informar ADMIN_PASSWORD."""
+    password = st.secrets.get('ADMIN_PASSWORD')
+    if not password:
+        st.error('Página administrativa desabilitada.')
+        st.stop()
+    if st.session_state.get('is_admin'):
+        return
+    with st.form(key='form_admin'):
+        typed = st.text_input('Senha de administrador', type='password')
+        submitted = st.form_submit_button('Entrar')
+    if submitted and hmac.compare_digest(typed, password):
+        st.session_state.is_admin = True
+        st.rerun()
+    if submitted:
+        st.error('Senha incorreta.')
+    st.stop()
+
+
+def main():
+    st.set_page_config(page_title='Classificação | DLPL', layout='wide')
+    require_admin()
+    db = get_database(get_db_connection())
+    if db is None:
+        st.error('Falha na conexão com o banco de dados.')
+        st.stop()
+
+    config = get_configuracoes_cached(db)
+    st.title('Classificação por turma')
+    semester = st.text_input('Semestre', value=config.get('activeSemester'))
+    cutoff = config.get('cutoffScore', 6.75)
+    if st.button('Recarregar do banco'):
+        invalidate_ranking(semester)
+
+    turmas = get_ranked_turmas(db, semester)
+    if not turmas:
+        st.info('Nenhuma inscrição com nota predita neste semestre.')
+        st.stop()
+    turma = st.selectbox(
+        'Turma',
+        sorted(turmas),
+        format_func=lambda name: f'{name} ({turmas[name]} inscrições)',
+    )
+    capacity = turma_capacities(db, semester).get(turma)
+
+    start = time.perf_counter()
+    rows = get_turma_ranking(db, semester, turma, cutoff, capacity)
+    elapsed = (time.perf_counter() - start) * 1000
+    if not rows:
+        st.info('Nenhuma inscrição classificada nesta turma.')
+        st.stop()
+
+    counts = pd.Series([row['situacao'] for row in rows]).value_counts()
+    columns = st.columns(len(SITUACOES))
+    for column, (key, label) in zip(columns, SITUACOES.items()):
+        column.metric(label, int(counts.get(key, 0)))
+    st.caption(
+        f'Nota mínima para dispensa: {cutoff}. Vagas: '
+        f'{capacity if capacity is not None else "sem limite"}. '
+        f'Calculado em {elapsed:.1f}ms.'
+    )
+
+    frame = pd.DataFrame(rows).drop(columns='token_enem')
+    frame['situacao'] = frame['situacao'].map(SITUACOES)
+    st.dataframe(frame, hide_index=True, use_container_width=True)
+    st.download_button(
+        'Baixar CSV',
+        frame.to_csv(index=False, sep=';').encode('utf-8-sig'),
+        file_name=f'classificacao_{semester}_{turma}.csv',
+        mime='text/csv',
+    )
+
+
+main()
@@ -0,0 +1,52 @@
+"""
+Garante os índices e audita os planos de consulta de core.crud.
+
+Executa explain() em cada consulta e termina com erro se algum plano usar
+COLLSCAN.
+
+Uso:
+    python -m scripts.audit_indexes [--semester 2025.2]
+"""
+import argparse
+
+from core.database import get_database, get_db_connection
+from core.indexes import audit_query_plans, ensure_indexes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--matricula', default='20250000000')
+    parser.add_argument('--semester', default='2025.2')
+    parser.add_argument('--token', default='auditoria==')
+    parser.add_argument('--nome', default='Calouro de Auditoria')
+    args = parser.parse_args()
+
+    db = get_database(get_db_connection())
+    if db is None:
+        raise SystemExit('Falha na conexão com o banco de dados.')
+
+    for name in ensure_indexes(db):
+        print(f'índice garantido: {name}')
+
+    plans = audit_query_plans(
+        db,
+        {
+            'matricula': args.matricula,
+            'semester': args.semester,
+            'token': args.token,
+            'nome': args.nome,
+        },
+    )
+    collscans = []
+    for query, stages in plans.items():
+        status = 'COLLSCAN' if 'COLLSCAN' in stages else 'ok'
+        print(f'{query:<40} {status:<9} {" > ".join(stages)}')
+        if status == 'COLLSCAN':
+            collscans.append(query)
+
+    if collscans:
+        raise SystemExit(f'Consultas sem índice: {", ".join(collscans)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+"""
+Invalida o cache de configurações e turmas de todas as réplicas do app.
+
+Rode depois de editar o documento de 'config' ou a coleção 'turma'.
+
+Uso:
+    python -m scripts.bump_config_version
+"""
+from core.cache import VERSION_CHECK_SECONDS, bump_config_version
+from core.database import get_database, get_db_connection
+
+
+def main():
+    db = get_database(get_db_connection())
+    if db is None:
+        raise SystemExit('Falha na conexão com o banco de dados.')
+    version = bump_config_version(db)
+    print(
+        f'Versão das configurações: {version}. As réplicas recarregam '
+        f'em até {VERSION_CHECK_SECONDS}s.'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Exporta as inscrições de um semestre em CSV ou Parquet.
+
+As inscrições são lidas em lotes com projeção e gravadas lote a lote pelo
+pyarrow, então a memória não cresce com o número de inscrições. As notas de
+'notas_relevantes' viram colunas numéricas de um esquema fixo. O token do
+ENEM só é exportado com --include-token.
+
+Uso:
+    python -m scripts.export_enrollments --semester 2025.2 -o inscricoes.csv
+    python -m scripts.export_enrollments --semester 2025.2 -o i.parquet \\
+        --turma "Turma 01" --escolha "Dispensa de disciplina"
+"""
+import argparse
+import resource
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from pymongo import ASCENDING
+from pymongo.database import Database
+
+from core.database import get_database, get_db_connection
+
+SCHEMA = pa.schema(
+    [
+        ('semester', pa.string()),
+        ('Matricula', pa.string()),
+        ('Nome', pa.string()),
+        ('Curso', pa.string()),
+        ('Centro', pa.string()),
+        ('turma_escolhida', pa.string()),
+        ('escolha', pa.string()),
+        ('nota_redacao', pa.float64()),
+        ('nota_linguagens', pa.float64()),
+        ('nota_predita', pa.float64()),
+        ('versao_coeficientes', pa.string()),
+        ('data_inscricao', pa.string()),
+        ('data_ultima_atualizacao', pa.string()),
+        ('token_enem', pa.string()),
+    ]
+)
+NOTAS = ('nota_redacao', 'nota_linguagens', 'nota_predita')
+
+
+def export_filter(
+    semester: str, turmas: list[str] | None, escolha: str | None
+) -> Dict[str, Any]:
+    query = {'semester': semester}
+    if turmas:
+        query['turma_escolhida'] = {'$in': turmas}
+    if escolha:
+        query['escolha'] = escolha
+    return query
+
+
+def iter_enrollments(
+    db: Database, query: Dict[str, Any], schema: pa.Schema, batch_size: int
+) -> Iterator[Dict[str, Any]]:
+    projection = {
+        name: 1
+        for name in schema.names
+        if name not in NOTAS and name != 'versao_coeficientes'
+    }
+    projection['notas_relevantes'] = 1
+    projection['_id'] = 0
+    return (
+        db['inscricoes']
+        .find(query, projection)
+        .sort('_id', ASCENDING)
+        .batch_size(batch_size)
+    )
+
+
+def _score(value: Any) -> float | None:
+    """'598,7', 598.7 ou 'N/A' -> float ou nulo."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def to_record_batch(
+    docs: list[Dict[str, Any]], schema: pa.Schema
+) -> pa.RecordBatch:
+    """Achata `notas_relevantes` e converte o lote para o esquema fixo."""
+    columns = {name: [] for name in schema.names}
+    for doc in docs:
+        notas = doc.get('notas_relevantes') or {}
+        for name in schema.names:
+            if name in NOTAS:
+                columns[name].append(_score(notas.get(name)))
+            elif name == 'versao_coeficientes':
+                columns[name].append(notas.get(name))
+            else:
+                value = doc.get(name)
+                columns[name].append(None if value is None else str(value))
+    return pa.RecordBatch.from_pydict(columns, schema=schema)
+
+
+def open_writer(path: Path, schema: pa.Schema, fmt: str):
+    if fmt == 'parquet':
+        return pq.ParquetWriter(path, schema, compression='zstd')
+    return pa_csv.CSVWriter(
+        path, schema, write_options=pa_csv.WriteOptions(delimiter=';')
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--semester', required=True)
+    parser.add_argument('-o', '--output', type=Path, default=None)
+    parser.add_argument('--format', choices=('csv', 'parquet'), default=None)
+    parser.add_argument(
+        '--turma', action='append', help='pode ser repetido'
+    )
+    parser.add_argument('--escolha', default=None)
+    parser.add_argument('--include-token', action='store_true')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+    fmt = args.format or (
+        'parquet'
+        if args.output and args.output.suffix == '.parquet'
+        else 'csv'
+    )
+    output = args.output or Path(f'inscricoes_{args.semester}.{fmt}')
+    schema = SCHEMA
+    if not args.include_token:
+        schema = schema.remove(schema.get_field_index('token_enem'))
+
+    db = get_database(get_db_connection())
+    if db is None:
+        raise SystemExit('Falha na conexão com o banco de dados.')
+
+    query = export_filter(args.semester, args.turma, args.escolha)
+    enrollments = iter_enrollments(db, query, schema, args.batch_size)
+    start = time.perf_counter()
+    count = 0
+    with open_writer(output, schema, fmt) as writer:
+        while batch := list(islice(enrollments, args.batch_size)):
+            writer.write_batch(to_record_batch(batch, schema))
+            count += len(batch)
+
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f'{count} inscrições em {output} em {elapsed:.1f}s '
+        f'(pico de memória {peak_mb:.0f} MiB)'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Exporta os comprovantes de todas as inscrições de um semestre em um ZIP.
+
+As inscrições são lidas em lotes e os comprovantes renderizados em
+processos paralelos, com um número limitado de trabalhos em andamento, e
+gravados no ZIP à medida que ficam prontos. Assim a memória não cresce com
+o número de inscrições. Com --merged, o ZIP recebe volumes de PDF com
+várias páginas em vez de um arquivo por aluno.
+
+Uso:
+    python -m scripts.export_receipts --semester 2025.2 --output c.zip
+    python -m scripts.export_receipts --semester 2025.2 --merged
+"""
+import argparse
+import resource
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from io import BytesIO
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+from pymongo import ASCENDING
+from pymongo.database import Database
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from core.database import get_database, get_db_connection
+from utils.generate_pdf import draw_receipt, render_pdf
+
+RECEIPT_PROJECTION = {
+    '_id': 0,
+    'Nome': 1,
+    'Matricula': 1,
+    'Curso': 1,
+    'semester': 1,
+    'turma_escolhida': 1,
+    'escolha': 1,
+    'notas_relevantes': 1,
+    'data_ultima_atualizacao': 1,
+    'token_enem': 1,
+}
+
+
+def iter_enrollments(
+    db: Database, semester: str, batch_size: int
+) -> Iterator[Dict[str, Any]]:
+    return (
+        db['inscricoes']
+        .find({'semester': semester}, RECEIPT_PROJECTION)
+        .sort('_id', ASCENDING)
+        .batch_size(batch_size)
+    )
+
+
+def render_volume(enrollments: list[Dict[str, Any]]) -> bytes:
+    """Renderiza vários comprovantes como páginas de um único PDF."""
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    for data in enrollments:
+        draw_receipt(c, data)
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def bounded_map(
+    executor: Executor,
+    func: Callable,
+    items: Iterable,
+    max_in_flight: int,
+) -> Iterator:
+    """Como executor.map, mas sem consumir `items` além da janela."""
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--semester', required=True)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument(
+        '--merged',
+        action='store_true',
+        help='grava volumes com várias páginas em vez de um PDF por aluno',
+    )
+    parser.add_argument('--pages-per-volume', type=int, default=1000)
+    args = parser.parse_args()
+    output = args.output or f'comprovantes_{args.semester}.zip'
+
+    db = get_database(get_db_connection())
+    if db is None:
+        raise SystemExit('Falha na conexão com o banco de dados.')
+
+    enrollments = iter_enrollments(db, args.semester, args.batch_size)
+    start = time.perf_counter()
+    count = 0
+    with ProcessPoolExecutor(args.workers) as executor, zipfile.ZipFile(
+        output, 'w', compression=zipfile.ZIP_STORED
+    ) as archive:
+        window = args.workers * 2
+        if args.merged:
+            volumes = chunked(enrollments, args.pages_per_volume)
+            for i, (pages, pdf) in enumerate(
+                bounded_map(executor, _render_counted, volumes, window), 1
+            ):
+                archive.writestr(
+                    f'comprovantes_{args.semester}_{i:03d}.pdf', pdf
+                )
+                count += pages
+        else:
+            pairs = ((d.get('Matricula', 'aluno'), d) for d in enrollments)
+            for i, (matricula, pdf) in enumerate(
+                bounded_map(executor, _render_named, pairs, window), 1
+            ):
+                archive.writestr(f'{i:05d}_comprovante_{matricula}.pdf', pdf)
+                count = i
+
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f'{count} comprovantes em {output} em {elapsed:.1f}s '
+        f'({count / elapsed if elapsed else 0:.1f}/s, pico de memória '
+        f'{peak_mb:.0f} MiB)'
+    )
+
+
+def _render_counted(chunk: list[Dict[str, Any]]) -> tuple[int, bytes]:
+    return len(chunk), render_volume(chunk)
+
+
+def _render_named(pair: tuple[str, Dict[str, Any]]) -> tuple[str, bytes]:
+    matricula, data = pair
+    return matricula, render_pdf(data)
+
+
+if __name__ == '__main__':
+    main()
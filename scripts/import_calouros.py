@@ -0,0 +1,58 @@
+"""
+Importa a lista de ingressantes do período para a coleção 'calouros'.
+
+Calouros ainda não aparecem em 'cursos.ufpb'; na validação, o nome que
+vem do ENEM é procurado nesta lista pelo nome normalizado e, se o arquivo
+tiver a coluna de matrícula, pela matrícula informada. A lista atual é
+substituída inteira pela do arquivo (CSV ou XLSX).
+
+Uso:
+    python -m scripts.import_calouros ingressantes_2025.csv
+    python -m scripts.import_calouros sisu.xlsx --col-nome "Nome do Candidato"
+"""
+import argparse
+import time
+from pathlib import Path
+
+from core.database import get_database, get_db_connection
+from core.roster import SIGAA_COLUMNS, import_calouros, read_roster
+
+COLUMNS = ('matricula', 'nome', 'curso', 'centro')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('path', type=Path)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--delimiter', default=';')
+    parser.add_argument('--encoding', default='utf-8-sig')
+    for key in COLUMNS:
+        parser.add_argument(f'--col-{key}', default=SIGAA_COLUMNS[key])
+    args = parser.parse_args()
+    columns = {key: getattr(args, f'col_{key}') for key in COLUMNS}
+
+    db = get_database(get_db_connection())
+    if db is None:
+        raise SystemExit('Falha na conexão com o banco de dados.')
+
+    start = time.perf_counter()
+    calouros = read_roster(
+        args.path,
+        columns,
+        args.delimiter,
+        args.encoding,
+        required=('nome',),
+        optional=('matricula',),
+    )
+    try:
+        total = import_calouros(db, calouros, args.batch_size)
+    except (ValueError, RuntimeError) as e:
+        raise SystemExit(str(e))
+    print(
+        f'{total} ingressantes importados em '
+        f'{time.perf_counter() - start:.1f}s.'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Importa a exportação de alunos ativos do SIGAA para 'cursos.ufpb'.
+
+O arquivo (CSV ou XLSX) é lido em fluxo e comparado com o cadastro atual:
+só as matrículas que entraram, saíram ou mudaram de nome são gravadas, em
+lotes de bulk_write, e a coleção 'alunos' é sincronizada nos cursos
+alterados. Cursos que não aparecem no arquivo ficam intactos, a menos que
+--prune-missing seja usado.
+
+Uso:
+    python -m scripts.import_roster alunos_ativos.csv --dry-run
+    python -m scripts.import_roster alunos_ativos.xlsx --prune-missing
+    python -m scripts.import_roster export.csv --col-nome "Nome do Aluno"
+"""
+import argparse
+import resource
+from pathlib import Path
+
+from core.database import get_database, get_db_connection
+from core.roster import SIGAA_COLUMNS, import_roster, read_roster
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('path', type=Path)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--delimiter', default=';')
+    parser.add_argument('--encoding', default='utf-8-sig')
+    for key, header in SIGAA_COLUMNS.items():
+        parser.add_argument(f'--col-{key}', default=header)
+    parser.add_argument(
+        '--prune-missing',
+        action='store_true',
+        help='esvazia os cursos que não aparecem no arquivo',
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='apenas relata as diferenças, sem gravar',
+    )
+    args = parser.parse_args()
+    columns = {key: getattr(args, f'col_{key}') for key in SIGAA_COLUMNS}
+
+    db = get_database(get_db_connection())
+    if db is None:
+        raise SystemExit('Falha na conexão com o banco de dados.')
+
+    alunos = read_roster(args.path, columns, args.delimiter, args.encoding)
+    try:
+        report = import_roster(
+            db,
+            alunos,
+            batch_size=args.batch_size,
+            dry_run=args.dry_run,
+            prune_missing=args.prune_missing,
+        )
+    except (ValueError, RuntimeError) as e:
+        raise SystemExit(str(e))
+
+    counts, timings = report['counts'], report['timings']
+    print(
+        f'{counts.get("rows", 0)} linhas lidas: {counts.get("added", 0)} '
+        f'matrículas novas, {counts.get("removed", 0)} removidas, '
+        f'{counts.get("renamed", 0)} com nome alterado, em '
+        f'{counts.get("courses", 0)} cursos '
+        f'({counts.get("batches", 0)} lotes).'
+    )
+    phases = (f'{phase} {seconds:.2f}s' for phase, seconds in timings.items())
+    print(f'  {", ".join(phases)}')
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'  pico de memória {peak_mb:.0f} MiB')
+    if args.dry_run:
+        print('Simulação: nada foi gravado.')
+
+
+if __name__ == '__main__':
+    main()
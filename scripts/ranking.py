@@ -0,0 +1,80 @@
+"""
+Imprime ou exporta a classificação das turmas de um semestre.
+
+A ordem é pela nota predita (maior primeiro; empate pela data de
+inscrição). Pedidos de dispensa com nota igual ou acima do cutoffScore da
+configuração não ocupam vaga; as vagas vêm do campo 'capacity' da turma.
+
+Uso:
+    python -m scripts.ranking
+    python -m scripts.ranking --semester 2025.2 --turma "Turma 01"
+    python -m scripts.ranking --csv classificacao.csv
+"""
+import argparse
+import csv
+import sys
+import time
+
+from core.crud import get_configuracoes
+from core.database import get_database, get_db_connection
+from core.ranking import (get_ranked_turmas, get_turma_ranking,
+                          turma_capacities)
+
+COLUMNS = [
+    'turma',
+    'classificacao',
+    'situacao',
+    'Matricula',
+    'Nome',
+    'escolha',
+    'nota_predita',
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--semester', default=None)
+    parser.add_argument('--turma', default=None)
+    parser.add_argument('--cutoff', type=float, default=None)
+    parser.add_argument('--csv', default=None, help='arquivo de saída')
+    args = parser.parse_args()
+
+    db = get_database(get_db_connection())
+    if db is None:
+        raise SystemExit('Falha na conexão com o banco de dados.')
+    config = get_configuracoes(db)
+    semester = args.semester or config.get('activeSemester')
+    cutoff = (
+        args.cutoff
+        if args.cutoff is not None
+        else config.get('cutoffScore', 6.75)
+    )
+
+    start = time.perf_counter()
+    turmas = get_ranked_turmas(db, semester)
+    print(
+        f'{sum(turmas.values())} inscrições classificadas em {semester} '
+        f'({(time.perf_counter() - start) * 1000:.0f}ms)',
+        file=sys.stderr,
+    )
+    capacities = turma_capacities(db, semester)
+    output = open(args.csv, 'w', newline='') if args.csv else sys.stdout
+    try:
+        writer = csv.DictWriter(
+            output, COLUMNS, extrasaction='ignore', delimiter=';'
+        )
+        writer.writeheader()
+        for turma in sorted(turmas):
+            if args.turma and turma != args.turma:
+                continue
+            for row in get_turma_ranking(
+                db, semester, turma, cutoff, capacities.get(turma)
+            ):
+                writer.writerow({'turma': turma, **row})
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
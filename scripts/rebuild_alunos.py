@@ -0,0 +1,42 @@
+"""
+Reconstrói a coleção materializada 'alunos' a partir de 'cursos.ufpb'.
+
+Uso:
+    python -m scripts.rebuild_alunos           # reconstrução completa
+    python -m scripts.rebuild_alunos --watch   # mantém sincronizada
+"""
+import argparse
+import time
+
+from core.alunos import rebuild_alunos, watch_cursos
+from core.database import get_database, get_db_connection
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help="após reconstruir, acompanha o change stream de 'cursos.ufpb'",
+    )
+    args = parser.parse_args()
+
+    db = get_database(get_db_connection())
+    if db is None:
+        raise SystemExit('Falha na conexão com o banco de dados.')
+
+    start = time.perf_counter()
+    total = rebuild_alunos(db)
+    print(
+        f"'alunos' reconstruída: {total} alunos em "
+        f'{time.perf_counter() - start:.2f}s'
+    )
+
+    if args.watch:
+        print("Acompanhando alterações em 'cursos.ufpb'...")
+        for operation, curso_id in watch_cursos(db):
+            print(f'{operation}: curso {curso_id} sincronizado')
+
+
+if __name__ == '__main__':
+    main()
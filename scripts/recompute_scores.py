@@ -0,0 +1,62 @@
+"""
+Recalcula a nota predita das inscrições de um semestre com novos coeficientes.
+
+Use depois de alterar ENEM_PREDICTION_BASE, ENEM_PREDICTION_LINGUAGENS ou
+ENEM_PREDICTION_REDACAO. As notas de Redação e Linguagens já gravadas são
+carregadas em lotes e recalculadas de forma vetorizada; só as inscrições
+cuja nota ou versão de coeficientes mudou são regravadas. Os coeficientes
+podem ser sobrescritos na linha de comando para simular uma mudança com
+--dry-run. Os servidores do app recarregam a classificação em até
+RANKING_VERSION_CHECK_SECONDS depois de uma gravação.
+
+Uso:
+    python -m scripts.recompute_scores --semester 2025.2
+    python -m scripts.recompute_scores --semester 2025.2 --base 1.2 --dry-run
+"""
+import argparse
+
+from core.database import get_database, get_db_connection
+from core.scores import recompute_predicted_scores
+from utils.enem import prediction_coefficients
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--semester', required=True)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--base', type=float, default=None)
+    parser.add_argument('--linguagens', type=float, default=None)
+    parser.add_argument('--redacao', type=float, default=None)
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='apenas conta as inscrições que mudariam, sem gravar',
+    )
+    args = parser.parse_args()
+
+    coefficients = prediction_coefficients()
+    for name in coefficients:
+        if getattr(args, name) is not None:
+            coefficients[name] = getattr(args, name)
+
+    db = get_database(get_db_connection())
+    if db is None:
+        raise SystemExit('Falha na conexão com o banco de dados.')
+
+    stats = recompute_predicted_scores(
+        db,
+        args.semester,
+        coefficients,
+        batch_size=args.batch_size,
+        dry_run=args.dry_run,
+    )
+    print(
+        f'Coeficientes {coefficients} (versão {stats["version"]}): '
+        f'{stats["scanned"]} inscrições lidas, {stats["changed"]} com nota '
+        f'alterada, {stats["written"]} gravadas em '
+        f'{stats["seconds"]:.1f}s.'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Recalcula os contadores de ocupação das turmas a partir de 'inscricoes'.
+
+Os contadores (total, cursar, dispensa) ficam no campo 'occupancy' de cada
+turma e são mantidos por save_enrollment; este script corrige qualquer
+divergência, como a deixada por edições manuais na coleção 'inscricoes'.
+Sem --semester, usa o semestre ativo da configuração. Prefira rodar fora
+dos horários de pico.
+
+Rode uma vez antes de ativar enforceCapacity na configuração: turmas sem
+contadores contam como vazias na reserva de vagas e aceitariam inscrições
+além da capacidade.
+
+Uso:
+    python -m scripts.reconcile_occupancy
+    python -m scripts.reconcile_occupancy --semester 2025.2 --dry-run
+"""
+import argparse
+
+from core.crud import get_configuracoes
+from core.database import get_database, get_db_connection
+from core.occupancy import OCCUPANCY_KEYS, reconcile_occupancy
+
+
+def format_counts(counts: dict) -> str:
+    return ' '.join(f'{key}={counts.get(key)}' for key in OCCUPANCY_KEYS)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[1],
+        epilog=(
+            'Rode uma vez antes de ativar enforceCapacity: turmas sem '
+            'contadores contam como vazias e aceitariam inscrições além da '
+            'capacidade.'
+        ),
+    )
+    parser.add_argument('--semester', default=None)
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='só relata as divergências, sem gravar',
+    )
+    args = parser.parse_args()
+
+    db = get_database(get_db_connection())
+    if db is None:
+        raise SystemExit('Falha na conexão com o banco de dados.')
+    semester = args.semester or get_configuracoes(db).get('activeSemester')
+    if not semester:
+        raise SystemExit('Nenhum semestre ativo na configuração.')
+
+    fixed = reconcile_occupancy(db, semester, dry_run=args.dry_run)
+    for turma, result in sorted(fixed.items()):
+        status = ' (não resolvida)' if result.get('unresolved') else ''
+        print(
+            f'{turma}: {format_counts(result["found"])} -> '
+            f'{format_counts(result["expected"])}{status}'
+        )
+    action = 'divergentes' if args.dry_run else 'corrigidas'
+    print(f'{semester}: {len(fixed)} turma(s) {action}.')
+    if any(result.get('unresolved') for result in fixed.values()):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
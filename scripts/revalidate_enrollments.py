@@ -0,0 +1,192 @@
+"""
+Revalida no INEP as notas de todas as inscrições de um semestre.
+
+Lê 'inscricoes' em lotes, busca novamente cada token no INEP com
+concorrência limitada, recalcula 'notas_relevantes' e grava apenas o que
+mudou com bulk_write. O progresso fica em um checkpoint, então uma execução
+interrompida pode ser retomada. Se o INEP ficar indisponível ou parar de
+responder no meio, a execução para antes da primeira inscrição não
+revalidada, e rodar o mesmo comando de novo continua dali.
+
+Uso:
+    python -m scripts.revalidate_enrollments --semester 2025.2 --workers 8
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+from pymongo.database import Database
+
+from core.database import get_database, get_db_connection
+from core.enem_cache import fetch_enem_scores_cached
+from utils.enem import parse_relevant_scores
+from utils.inep_client import InepUnavailableError
+
+
+def load_checkpoint(path: Path, semester: str) -> ObjectId | None:
+    if not path.exists():
+        return None
+    checkpoint = json.loads(path.read_text())
+    if checkpoint.get('semester') != semester:
+        return None
+    return ObjectId(checkpoint['last_id'])
+
+
+def save_checkpoint(path: Path, semester: str, last_id: ObjectId):
+    path.write_text(
+        json.dumps({'semester': semester, 'last_id': str(last_id)})
+    )
+
+
+def revalidate(db: Database, doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Revalida uma inscrição e devolve o resultado da comparação. Falhas
+    transitórias (INEP fora do ar, sem resposta no prazo ou fila cheia)
+    ficam marcadas como 'unavailable' e são refeitas na retomada; só um
+    token recusado pelo INEP conta como falha definitiva.
+    """
+    try:
+        enem_data = fetch_enem_scores_cached(
+            db, doc['token_enem'], use_cache=False
+        )
+    except InepUnavailableError as e:
+        return {'_id': doc['_id'], 'error': str(e), 'unavailable': True}
+    if enem_data is None:
+        return {'_id': doc['_id'], 'error': 'token recusado pelo INEP'}
+    notas = parse_relevant_scores(enem_data)
+    return {
+        '_id': doc['_id'],
+        'notas_relevantes': notas,
+        'changed': notas != doc.get('notas_relevantes'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--semester', required=True)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--checkpoint', type=Path, default=None)
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='apenas relata as diferenças, sem gravar',
+    )
+    args = parser.parse_args()
+    checkpoint = args.checkpoint or Path(
+        f'.revalidate_{args.semester}.json'
+    )
+
+    db = get_database(get_db_connection())
+    if db is None:
+        raise SystemExit('Falha na conexão com o banco de dados.')
+
+    query = {'semester': args.semester}
+    last_id = load_checkpoint(checkpoint, args.semester)
+    if last_id:
+        query['_id'] = {'$gt': last_id}
+        print(f'Retomando após {last_id}')
+    total = db['inscricoes'].count_documents(query)
+    cursor = (
+        db['inscricoes']
+        .find(query, {'token_enem': 1, 'notas_relevantes': 1})
+        .sort('_id', ASCENDING)
+        .batch_size(args.batch_size)
+    )
+
+    processed = changed = 0
+    failures = []
+    stopped = None
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        for batch in _batches(cursor, args.batch_size):
+            batch_changed, done, stopped = _process_batch(
+                db, executor, batch, failures, args
+            )
+            changed += batch_changed
+            processed += done
+            if stopped is not None:
+                # O checkpoint não passa da primeira inscrição que ficou
+                # sem resposta do INEP.
+                if done:
+                    save_checkpoint(
+                        checkpoint, args.semester, batch[done - 1]['_id']
+                    )
+                break
+            save_checkpoint(checkpoint, args.semester, batch[-1]['_id'])
+            _report(processed, total, changed, failures, start)
+
+    print(f'Processadas: {processed} inscrições, {changed} atualizadas.')
+    for failure in failures:
+        print(f'  falha {failure["_id"]}: {failure["error"]}')
+    if stopped is not None:
+        raise SystemExit(
+            f'Interrompido em {stopped["_id"]}: {stopped["error"]}. '
+            'Rode o mesmo comando para retomar.'
+        )
+    checkpoint.unlink(missing_ok=True)
+
+
+def _batches(cursor, size: int) -> Iterator[list[Dict[str, Any]]]:
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _process_batch(
+    db, executor, batch, failures, args
+) -> tuple[int, int, Dict[str, Any] | None]:
+    """
+    Revalida o lote e grava as alterações. Devolve (alteradas, quantas
+    inscrições do início do lote foram processadas, resultado da primeira
+    marcada 'unavailable' ou None): o lote é cortado nela.
+    """
+    results = list(executor.map(lambda doc: revalidate(db, doc), batch))
+    done = next(
+        (i for i, result in enumerate(results) if result.get('unavailable')),
+        len(results),
+    )
+    now = datetime.now().isoformat()
+    operations = []
+    for result in results[:done]:
+        if 'error' in result:
+            failures.append(result)
+        elif result['changed']:
+            operations.append(
+                UpdateOne(
+                    {'_id': result['_id']},
+                    {
+                        '$set': {
+                            'notas_relevantes': result['notas_relevantes'],
+                            'data_revalidacao': now,
+                        }
+                    },
+                )
+            )
+    if operations and not args.dry_run:
+        db['inscricoes'].bulk_write(operations, ordered=False)
+    stopped = results[done] if done < len(results) else None
+    return len(operations), done, stopped
+
+
+def _report(processed, total, changed, failures, start):
+    elapsed = time.perf_counter() - start
+    print(
+        f'{processed}/{total} processadas | {changed} alteradas | '
+        f'{len(failures)} falhas | {processed / elapsed:.1f} inscrições/s'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Coroutine
+
+# Threads para o código bloqueante chamado via asyncio.to_thread (o
+# cliente do INEP espera na fila do limitador dentro de uma delas).
+AIO_THREADS = 64
+
+_lock = threading.Lock()
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Event loop do processo, rodando em uma thread própria. O cliente async
+    do MongoDB fica preso ao loop em que foi usado pela primeira vez, então
+    todas as sessões do Streamlit submetem suas corrotinas a este.
+    """
+    global _loop
+    with _lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            loop.set_default_executor(
+                ThreadPoolExecutor(AIO_THREADS, thread_name_prefix='aio')
+            )
+            threading.Thread(
+                target=loop.run_forever, name='aio-loop', daemon=True
+            ).start()
+            _loop = loop
+    return _loop
+
+
+def submit(coro: Coroutine) -> Future:
+    """Agenda `coro` no loop do processo e devolve um Future de threads."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+def run(coro: Coroutine, timeout: float | None = None) -> Any:
+    """Executa `coro` no loop do processo e espera o resultado."""
+    return submit(coro).result(timeout)
@@ -1,66 +1,146 @@
+import hashlib
 import json
 import re
+import threading
+import time
+from functools import lru_cache
 from io import BytesIO
-from time import sleep
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Callable, Dict
 
-import pypdf
-import requests
 import streamlit as st
 
-ENEM_API_URL = st.secrets['ENEM_API_URL']
+from utils.inep_client import InepClient, TokenBucket
+from utils.metrics import timed
+
+if TYPE_CHECKING:
+    import pypdf
+
+# Criado na primeira consulta ao INEP, e não na importação, para que o
+# carregamento do app não dependa das secrets do INEP.
+_inep_client: InepClient | None = None
+_inep_client_lock = threading.Lock()
+
+HASH_PATTERN = re.compile(r'([a-zA-Z0-9=/]+==)')
+RAW_HASH_PATTERN = re.compile(rb'[(\s]([a-zA-Z0-9=/]+==)\)')
+PDF_MAX_BYTES = 5 * 1024 * 1024
+PDF_MAX_PAGES = 20
+PDF_SCAN_PAGES = 3
+PDF_TIME_BUDGET_SECONDS = 3.0
+
+
+def _get_inep_client() -> InepClient:
+    global _inep_client
+    with _inep_client_lock:
+        if _inep_client is None:
+            # Limite de requisições por segundo ao INEP somando todas as
+            # sessões.
+            _inep_client = InepClient(
+                st.secrets['ENEM_API_URL'],
+                rate_limiter=TokenBucket(
+                    rate=float(st.secrets.get('INEP_RATE_LIMIT', 10)),
+                    burst=int(st.secrets.get('INEP_RATE_BURST', 20)),
+                    max_wait=float(st.secrets.get('INEP_MAX_QUEUE_WAIT', 30)),
+                ),
+            )
+        return _inep_client
 
 
 def extract_hash_from_pdf(pdf_file: BytesIO) -> str | None:
+    """
+    Extrai a "Chave de validação" do PDF do ENEM.
+
+    Percorre as páginas em ordem e para na primeira ocorrência. Em cada
+    página tenta primeiro o conteúdo bruto, mais barato, e só então a
+    extração de texto. Limites de tamanho, páginas e tempo protegem o
+    servidor de PDFs enormes ou maliciosos.
+    """
     try:
+        if pdf_file.getbuffer().nbytes > PDF_MAX_BYTES:
+            return None
+        import pypdf
+
+        deadline = time.monotonic() + PDF_TIME_BUDGET_SECONDS
         reader = pypdf.PdfReader(pdf_file)
-        full_text = ''
-        for page in reader.pages:
-            full_text += page.extract_text()
-        match = re.search(r'([a-zA-Z0-9=/]+==)', full_text)
-        if match:
-            return match.group(1)
+        if len(reader.pages) > PDF_MAX_PAGES:
+            return None
+        for page in reader.pages[:PDF_SCAN_PAGES]:
+            hash_token = _scan_raw_content(page)
+            if hash_token:
+                return hash_token
+            if time.monotonic() > deadline:
+                return None
+            match = HASH_PATTERN.search(page.extract_text())
+            if match:
+                return match.group(1)
+            if time.monotonic() > deadline:
+                return None
         return None
+    except MemoryError:
+        # Sobe para o sandbox, que descarta o processo e relata o erro.
+        raise
     except Exception:
         return None
 
 
-def fetch_enem_scores(hash_token: str) -> Dict[str, Any] | None:
+def _scan_raw_content(page: 'pypdf.PageObject') -> str | None:
+    """Procura o token nas strings literais do content stream da página."""
+    contents = page.get_contents()
+    if contents is None:
+        return None
+    match = RAW_HASH_PATTERN.search(contents.get_data())
+    if match:
+        return match.group(1).decode('ascii')
+    return None
+
+
+@timed('inep.fetch_enem_scores')
+def fetch_enem_scores(
+    hash_token: str, on_wait: Callable[[int, float], None] | None = None
+) -> Dict[str, Any] | None:
     """
-    Busca os resultados do ENEM com retentativas e uma requisição que imita o cURL.
+    Busca os resultados do ENEM pelo cliente compartilhado do INEP.
+    Retorna None se o INEP recusar o token. Levanta InepUnavailableError
+    enquanto o INEP estiver fora do ar, não responder a tempo
+    (InepTimeoutError) ou a fila estiver cheia; `on_wait(posição, espera)`
+    informa a fila.
     """
-    headers = {
-        'Content-Type': 'application/json',
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': '*/*',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-    }
-    payload = {'hash': hash_token}
+    return _get_inep_client().fetch(hash_token, on_wait)
 
-    payload_str = json.dumps(payload)
 
-    MAX_RETRIES = 5
-    RETRY_DELAY_SECONDS = 1
+@timed('inep.fetch_enem_scores_async')
+async def fetch_enem_scores_async(
+    hash_token: str, on_wait: Callable[[int, float], None] | None = None
+) -> Dict[str, Any] | None:
+    """Versão async de fetch_enem_scores."""
+    return await _get_inep_client().fetch_async(hash_token, on_wait)
 
-    for _ in range(MAX_RETRIES):
-        try:
-            response = requests.post(
-                ENEM_API_URL,
-                headers=headers,
-                data=payload_str,
-                verify=False,
-                timeout=15,
-            )
 
-            response.raise_for_status()
+def inep_stats() -> Dict[str, Any]:
+    if _inep_client is None:
+        return {}
+    return _inep_client.stats()
 
-            return response.json()
 
-        except requests.exceptions.RequestException as e:
-            sleep(RETRY_DELAY_SECONDS)
+def prediction_coefficients() -> Dict[str, float]:
+    """Coeficientes atuais da nota predita, lidos das secrets."""
+    return {
+        'base': float(st.secrets['ENEM_PREDICTION_BASE']),
+        'linguagens': float(st.secrets['ENEM_PREDICTION_LINGUAGENS']),
+        'redacao': float(st.secrets['ENEM_PREDICTION_REDACAO']),
+    }
 
-    return None
+
+@lru_cache(maxsize=16)
+def _coefficients_version(items: tuple) -> str:
+    return hashlib.sha256(json.dumps(items).encode()).hexdigest()[:12]
+
+
+def coefficients_version(coefficients: Dict[str, float]) -> str:
+    """
+    Identificador estável de um conjunto de coeficientes, gravado em cada
+    inscrição junto com a nota predita calculada com ele.
+    """
+    return _coefficients_version(tuple(sorted(coefficients.items())))
 
 
 def parse_relevant_scores(enem_data: Dict[str, Any]) -> Dict[str, str]:
@@ -83,15 +163,16 @@ def parse_relevant_scores(enem_data: Dict[str, Any]) -> Dict[str, str]:
                 scores['nota_linguagens'] = prova.get('nota', 'N/A')
                 break
 
+        coefficients = prediction_coefficients()
         scores['nota_predita'] = round(
-            st.secrets['ENEM_PREDICTION_BASE']
-            + st.secrets['ENEM_PREDICTION_LINGUAGENS']
+            coefficients['base']
+            + coefficients['linguagens']
             * float(
                 scores['nota_linguagens'].replace(',', '.')
                 if scores['nota_linguagens'] != 'N/A'
                 else 0
             )
-            + st.secrets['ENEM_PREDICTION_REDACAO']
+            + coefficients['redacao']
             * float(
                 scores['nota_redacao']
                 if scores['nota_redacao'] != 'N/A'
@@ -99,6 +180,7 @@ def parse_relevant_scores(enem_data: Dict[str, Any]) -> Dict[str, str]:
             ),
             2,
         )
+        scores['versao_coeficientes'] = coefficients_version(coefficients)
 
     except Exception as e:
         print(f'Erro ao extrair notas: {e}')
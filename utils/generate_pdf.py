@@ -1,121 +1,196 @@
-from datetime import datetime,timezone
-from zoneinfo import ZoneInfo
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from io import BytesIO
+from typing import TYPE_CHECKING
+from zoneinfo import ZoneInfo
 
-from reportlab.lib.colors import HexColor
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import inch
-from reportlab.pdfgen import canvas
+from cachetools import LRUCache
 import streamlit as st
 
+from utils.metrics import timed
+from utils.style import load_static_asset
 
-def generate_pdf(data: dict) -> BytesIO:
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    primary_color = HexColor('#4A7729')
-    text_color = HexColor('#333333')
-    try:
-        c.drawImage(
-            'logo.png',
-            x=inch,
-            y=height - 2 * inch,
-            width=1.5 * inch,
-            height=1.5 * inch,
-            preserveAspectRatio=True,
-            mask='auto',
-        )
-    except:
-        st.warning("Arquivo 'logo.png' não encontrado.")
+# O reportlab só é importado ao gerar o primeiro comprovante.
+if TYPE_CHECKING:
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+LOGO_NAME = 'logo.png'
+TEMPLATE_FORM = 'comprovante_template'
+PRIMARY_COLOR = '#4A7729'
+TEXT_COLOR = '#333333'
+FOOTER_COLOR = '#888888'
+# reportlab.lib.pagesizes.letter e reportlab.lib.units.inch, em pontos.
+PAGE_WIDTH, PAGE_HEIGHT = 612.0, 792.0
+INCH = 72.0
+
+try:
+    LOCAL_TZ = ZoneInfo("America/Recife")
+except Exception:
+    LOCAL_TZ = timezone(timedelta(hours=-3))
+
+_receipts = LRUCache(maxsize=256)
+_receipts_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _logo_reader() -> 'ImageReader | None':
+    """
+    Lê e decodifica o logo uma única vez por processo. Também desliga a
+    codificação ASCII85 das imagens (rl_config.useA85): sem a extensão
+    rl_accel, o codificador em Python levava quase todo o tempo de cada
+    comprovante, e o PDF aceita o stream binário comprimido.
+    """
+    from reportlab import rl_config
+    from reportlab.lib.utils import ImageReader
+
+    rl_config.useA85 = 0
+
+    asset = load_static_asset(LOGO_NAME)
+    if asset is None:
+        return None
+    reader = ImageReader(BytesIO(asset.data))
+    # Decodifica já aqui, e não no primeiro drawImage de cada thread.
+    reader.getRGBData()
+    return reader
+
+
+def _draw_logo(c: 'canvas.Canvas', x, y, width, height) -> bool:
+    """
+    Desenha o logo pela API pública do canvas. Como é chamado dentro do
+    template, a imagem é comprimida uma vez por documento.
+    """
+    logo = _logo_reader()
+    if logo is None:
+        return False
+    c.drawImage(
+        logo, x, y, width, height, preserveAspectRatio=True, mask='auto'
+    )
+    return True
+
+
+def _ensure_template(c: 'canvas.Canvas'):
+    """Desenha uma vez por documento as partes fixas do comprovante."""
+    if c.hasForm(TEMPLATE_FORM):
+        return
+    c.beginForm(TEMPLATE_FORM)
+    if not _draw_logo(
+        c,
+        INCH,
+        PAGE_HEIGHT - 2 * INCH,
+        1.5 * INCH,
+        1.5 * INCH,
+    ):
+        st.warning(f"Arquivo '{LOGO_NAME}' não encontrado.")
     c.setFont('Helvetica-Bold', 20)
-    c.setFillColor(primary_color)
+    c.setFillColor(PRIMARY_COLOR)
     c.drawCentredString(
-        width / 2, height - 1.5 * inch, 'Comprovante de Inscrição'
+        PAGE_WIDTH / 2, PAGE_HEIGHT - 1.5 * INCH, 'Comprovante de Inscrição'
     )
-    c.setStrokeColor(primary_color)
+    c.setStrokeColor(PRIMARY_COLOR)
     c.setLineWidth(1)
-    c.line(inch, height - 2.2 * inch, width - inch, height - 2.2 * inch)
-    y_position = height - 3 * inch
-    line_height = 0.3 * inch
+    c.line(
+        INCH,
+        PAGE_HEIGHT - 2.2 * INCH,
+        PAGE_WIDTH - INCH,
+        PAGE_HEIGHT - 2.2 * INCH,
+    )
+    c.setFont('Helvetica-Oblique', 9)
+    c.setFillColor(FOOTER_COLOR)
+    c.drawCentredString(
+        PAGE_WIDTH / 2,
+        INCH,
+        'Este é um documento gerado automaticamente pelo sistema.',
+    )
+    c.endForm()
+
 
-    update_time_str = 'N/A'
+def _format_update_time(update_time_iso: str | None) -> str:
+    if not update_time_iso:
+        return 'N/A'
     try:
-        LOCAL_TZ = ZoneInfo("America/Recife")
-    except Exception:
-        from datetime import timedelta
-        LOCAL_TZ = timezone(timedelta(hours=-3))
+        parsed_time = datetime.fromisoformat(update_time_iso)
+        parsed_time = parsed_time.astimezone(LOCAL_TZ)
+        return parsed_time.strftime('%d/%m/%Y às %H:%M:%S')
+    except ValueError:
+        return 'N/A (data inválida)'
 
-    update_time_iso = data.get('data_ultima_atualizacao')
 
-    if update_time_iso:
-        try:
-            parsed_time = datetime.fromisoformat(update_time_iso)
-            parsed_time = parsed_time.astimezone(LOCAL_TZ)
-            update_time_str = parsed_time.strftime('%d/%m/%Y às %H:%M:%S')
-        except ValueError:
-            update_time_str = 'N/A (data inválida)'
+def draw_receipt(c: 'canvas.Canvas', data: dict):
+    """Desenha o comprovante de `data` na página atual do canvas."""
+    _ensure_template(c)
+    c.doForm(TEMPLATE_FORM)
 
+    update_time_str = _format_update_time(data.get('data_ultima_atualizacao'))
+    notas = data.get('notas_relevantes', {})
     info = [
+        (
+            'Status:',
+            'Inscrição Atualizada'
+            if data.get('is_update')
+            else 'Inscrição Realizada',
+        ),
         ('Nome Completo:', data.get('Nome', 'N/A')),
         ('Matrícula:', data.get('Matricula', 'N/A')),
         ('Curso:', data.get('Curso', 'N/A')),
         ('Semestre:', data.get('semester', 'N/A')),
         ('Turma Escolhida:', data.get('turma_escolhida', 'N/A')),
         ('Opção Escolhida:', data.get('escolha', 'N/A')),
-        (
-            'Nota de Redação:',
-            str(data.get('notas_relevantes', {}).get('nota_redacao', 'N/A')),
-        ),
-        (
-            'Nota de Linguagens:',
-            str(
-                data.get('notas_relevantes', {}).get('nota_linguagens', 'N/A')
-            ),
-        ),
-        (
-            'Nota Predita:',
-            str(data.get('notas_relevantes', {}).get('nota_predita', 'N/A')),
-        ),
+        ('Nota de Redação:', str(notas.get('nota_redacao', 'N/A'))),
+        ('Nota de Linguagens:', str(notas.get('nota_linguagens', 'N/A'))),
+        ('Nota Predita:', str(notas.get('nota_predita', 'N/A'))),
         ('Última Atualização:', update_time_str),
         ('Token do ENEM:', data.get('token_enem', 'N/A')),
     ]
 
-    status = (
-        'Inscrição Atualizada'
-        if data.get('is_update')
-        else 'Inscrição Realizada'
-    )
-    info.insert(0, ('Status:', status))
-
-    c.setFont('Helvetica', 12)
-    c.setFillColor(text_color)
+    y_position = PAGE_HEIGHT - 3 * INCH
+    line_height = 0.3 * INCH
+    c.setFillColor(TEXT_COLOR)
     for label, value in info:
         c.setFont('Helvetica-Bold', 12)
-        c.drawString(inch, y_position, label)
+        c.drawString(INCH, y_position, label)
         c.setFont('Helvetica', 12)
-        c.drawString(inch + 2 * inch, y_position, value)
+        c.drawString(INCH + 2 * INCH, y_position, value)
         y_position -= line_height
 
     c.setFont('Helvetica-Oblique', 9)
-    c.setFillColor(HexColor('#888888'))
-
-    if update_time_str != 'N/A' and 'inválida' not in update_time_str:
-        c.drawCentredString(
-            width / 2,
-            1.2 * inch,
-            f'Última atualização realizada em: {update_time_str}',
-        )
-
+    c.setFillColor(FOOTER_COLOR)
     c.drawCentredString(
-        width / 2,
-        1.2 * inch,
+        PAGE_WIDTH / 2,
+        1.2 * INCH,
         f'Última atualização realizada em: {update_time_str}',
     )
-    c.drawCentredString(
-        width / 2,
-        inch,
-        'Este é um documento gerado automaticamente pelo sistema.',
-    )
+
+
+def render_pdf(data: dict) -> bytes:
+    """Gera o comprovante de inscrição, sem passar pelo cache."""
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=(PAGE_WIDTH, PAGE_HEIGHT))
+    draw_receipt(c, data)
+    c.showPage()
     c.save()
-    buffer.seek(0)
-    return buffer
+    return buffer.getvalue()
+
+
+@timed('pdf.generate_pdf')
+def generate_pdf(data: dict) -> BytesIO:
+    """
+    Gera o comprovante de inscrição em PDF. O resultado é memorizado pelo
+    hash do conteúdo de `data`, então reruns da etapa final não redesenham
+    o documento.
+    """
+    key = hashlib.sha256(
+        json.dumps(data, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    with _receipts_lock:
+        pdf = _receipts.get(key)
+    if pdf is None:
+        pdf = render_pdf(data)
+        with _receipts_lock:
+            _receipts[key] = pdf
+    return BytesIO(pdf)
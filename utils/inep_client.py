@@ -0,0 +1,408 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict
+
+DEFAULT_HEADERS = {
+    'Content-Type': 'application/json',
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': '*/*',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+}
+# Respostas em que o INEP recusou o token: não adianta insistir. Qualquer
+# outro status de erro (408, 429, 5xx...) é uma falha e a chamada é refeita.
+TOKEN_REJECTED_STATUS = frozenset({400, 404, 422})
+
+
+class InepUnavailableError(Exception):
+    """O circuito está aberto: o INEP falhou repetidamente há pouco."""
+
+
+class InepTimeoutError(InepUnavailableError):
+    """O INEP não respondeu com sucesso dentro do prazo ou das tentativas."""
+
+
+class InepRateLimitedError(InepUnavailableError):
+    """A fila para o INEP está longa demais; `retry_after` estima a espera."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f'Fila do INEP cheia; tente em {retry_after:.0f}s')
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Limitador token bucket compartilhado por todas as sessões do processo.
+
+    Libera `rate` requisições por segundo, com rajadas de até `burst`. Quem
+    chega sem token entra em uma fila por ordem de chegada; se a espera
+    estimada passar de `max_wait`, a chamada é recusada na hora.
+    """
+
+    def __init__(self, rate: float, burst: int, max_wait: float = 30):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._next_ticket = 0
+        self._serving = 0
+        self._abandoned: set[int] = set()
+        self._counters = Counter()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def _advance(self):
+        while self._serving in self._abandoned:
+            self._abandoned.remove(self._serving)
+            self._serving += 1
+
+    def _eta(self, position: int) -> float:
+        return max(0.0, (position + 1 - self._tokens) / self.rate)
+
+    def acquire(self, on_wait: Callable[[int, float], None] | None = None):
+        """
+        Espera a vez na fila e consome um token. `on_wait(posição, espera
+        estimada em segundos)` é chamado periodicamente enquanto espera.
+        """
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            eta = self._eta(self._next_ticket - self._serving)
+            if eta > self.max_wait:
+                self._counters['rejected'] += 1
+                raise InepRateLimitedError(eta)
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            deadline = now + self.max_wait
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                self._refill(now)
+                self._advance()
+                if ticket == self._serving and self._tokens >= 1:
+                    self._tokens -= 1
+                    self._serving += 1
+                    self._advance()
+                    self._counters['granted'] += 1
+                    self._cond.notify_all()
+                    return
+                position = ticket - self._serving
+                eta = self._eta(position)
+                if now >= deadline:
+                    self._abandoned.add(ticket)
+                    self._advance()
+                    self._counters['rejected'] += 1
+                    self._cond.notify_all()
+                    raise InepRateLimitedError(eta)
+                self._counters['waited'] += 1
+                self._cond.wait(min(max(eta, 0.01), 0.5, deadline - now))
+            if on_wait:
+                on_wait(position, eta)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'tokens': self._tokens,
+                'queue_depth': (
+                    self._next_ticket - self._serving - len(self._abandoned)
+                ),
+                'granted': self._counters['granted'],
+                'rejected': self._counters['rejected'],
+            }
+
+
+class _InFlight:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class CircuitBreaker:
+    """
+    Disjuntor compartilhado entre as sessões. Abre após `failure_threshold`
+    falhas seguidas e, passado `reset_timeout`, deixa uma única chamada de
+    teste passar antes de fechar novamente.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def retry_after(self) -> float:
+        """Segundos até o circuito aceitar uma nova tentativa."""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            elapsed = time.monotonic() - self._opened_at
+            return max(0.0, self.reset_timeout - elapsed)
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and (
+                time.monotonic() - self._opened_at >= self.reset_timeout
+            ):
+                self._state = self.HALF_OPEN
+                return True
+            return False
+
+    def release(self):
+        """
+        Devolve a chamada de teste que terminou sem resposta do INEP: o
+        circuito volta a aberto e a próxima chamada testa de novo.
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.OPEN
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if (
+                self._state == self.HALF_OPEN
+                or self._failures >= self.failure_threshold
+            ):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+def _retry_after(response) -> float | None:
+    """Segundos pedidos no cabeçalho Retry-After (número ou data HTTP)."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+class InepClient:
+    """
+    Cliente HTTP reutilizável para a API de resultados do INEP.
+
+    Mantém um pool de conexões keep-alive, refaz tentativas com backoff
+    exponencial e jitter (ou a espera pedida em Retry-After) dentro de um
+    prazo total por chamada e falha
+    imediatamente enquanto o disjuntor estiver aberto. Cada tentativa
+    consome um token de `rate_limiter`, e chamadas simultâneas para o mesmo
+    token do ENEM compartilham uma única consulta.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_retries: int = 4,
+        attempt_timeout: float = 8,
+        deadline: float = 20,
+        backoff_base: float = 0.5,
+        backoff_max: float = 4,
+        pool_size: int = 32,
+        breaker: CircuitBreaker | None = None,
+        rate_limiter: TokenBucket | None = None,
+        verify: bool = False,
+    ):
+        self.url = url
+        self.max_retries = max_retries
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.verify = verify
+        self.breaker = breaker or CircuitBreaker()
+        self.rate_limiter = rate_limiter
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, _InFlight] = {}
+        self._counters = Counter()
+        self._recent = deque()
+        # requests só é importado quando o primeiro cliente é criado.
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _backoff(self, attempt: int) -> float:
+        """Backoff exponencial com jitter completo."""
+        ceiling = min(self.backoff_max, self.backoff_base * 2**attempt)
+        return random.uniform(0, ceiling)
+
+    def fetch(
+        self,
+        hash_token: str,
+        on_wait: Callable[[int, float], None] | None = None,
+    ) -> Dict[str, Any] | None:
+        """
+        Busca os resultados de um token. Retorna None só se o INEP recusar
+        o token (TOKEN_REJECTED_STATUS). Levanta InepTimeoutError se o prazo
+        ou as tentativas se esgotarem e InepUnavailableError se o circuito
+        estiver aberto ou a fila estiver cheia. `on_wait` é repassado a
+        TokenBucket.acquire.
+        """
+        with self._lock:
+            call = self._in_flight.get(hash_token)
+            leader = call is None
+            if leader:
+                call = self._in_flight[hash_token] = _InFlight()
+            else:
+                self._counters['coalesced'] += 1
+        if not leader:
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.result
+        try:
+            call.result = self._fetch(hash_token, on_wait)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[hash_token]
+            call.done.set()
+        return call.result
+
+    async def fetch_async(
+        self,
+        hash_token: str,
+        on_wait: Callable[[int, float], None] | None = None,
+    ) -> Dict[str, Any] | None:
+        """
+        Versão async de fetch. A chamada roda em uma thread do loop, e a
+        fila, o disjuntor e a consulta compartilhada continuam os mesmos
+        das chamadas síncronas.
+        """
+        return await asyncio.to_thread(self.fetch, hash_token, on_wait)
+
+    def _fetch(
+        self, hash_token: str, on_wait: Callable[[int, float], None] | None
+    ) -> Dict[str, Any] | None:
+        from requests.exceptions import RequestException
+
+        payload_str = json.dumps({'hash': hash_token})
+        deadline_at = None
+
+        for attempt in range(self.max_retries):
+            if self.rate_limiter:
+                # O token vem antes do disjuntor: uma recusa da fila não
+                # pode deixar pendente a chamada de teste do meio-aberto.
+                self.rate_limiter.acquire(on_wait)
+            if deadline_at is None:
+                # O prazo conta a partir da primeira vez na frente da fila.
+                deadline_at = time.monotonic() + self.deadline
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+            if not self.breaker.allow_request():
+                raise InepUnavailableError(
+                    f'INEP indisponível; tente em {self.breaker.retry_after():.0f}s'
+                )
+            self._count_request()
+            retry_after = None
+            try:
+                response = self.session.post(
+                    self.url,
+                    data=payload_str,
+                    verify=self.verify,
+                    timeout=min(self.attempt_timeout, remaining),
+                )
+                if response.status_code in TOKEN_REJECTED_STATUS:
+                    # O INEP respondeu e recusou o token.
+                    self.breaker.record_success()
+                    return None
+                if response.status_code >= 400:
+                    retry_after = _retry_after(response)
+                response.raise_for_status()
+                data = response.json()
+                self.breaker.record_success()
+                return data
+            except (RequestException, ValueError):
+                self.breaker.record_failure()
+            except BaseException:
+                # Saiu sem resposta do INEP: a tentativa não conta.
+                self.breaker.release()
+                raise
+
+            if attempt == self.max_retries - 1:
+                break
+            delay = max(self._backoff(attempt), retry_after or 0.0)
+            if time.monotonic() + delay >= deadline_at:
+                break
+            time.sleep(delay)
+
+        raise InepTimeoutError(
+            f'O INEP não respondeu em {self.deadline:.0f}s '
+            f'ou {self.max_retries} tentativas'
+        )
+
+    def _count_request(self):
+        now = time.monotonic()
+        with self._lock:
+            self._counters['requests'] += 1
+            self._recent.append(now)
+            while self._recent[0] < now - 60:
+                self._recent.popleft()
+
+    def stats(self) -> Dict[str, Any]:
+        """Requisições ao INEP, taxa recente e fila do limitador."""
+        now = time.monotonic()
+        breaker_open = self.breaker.state != CircuitBreaker.CLOSED
+        with self._lock:
+            while self._recent and self._recent[0] < now - 60:
+                self._recent.popleft()
+            stats = {
+                'requests': self._counters['requests'],
+                'requests_per_second': len(self._recent) / 60,
+                'coalesced': self._counters['coalesced'],
+                'in_flight': len(self._in_flight),
+                'breaker_open': int(breaker_open),
+            }
+        if self.rate_limiter:
+            stats['rate_limiter'] = self.rate_limiter.stats()
+        return stats
+
+    def close(self):
+        self.session.close()
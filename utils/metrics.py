@@ -0,0 +1,209 @@
+import bisect
+import inspect
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+logger = logging.getLogger('verificalp.metrics')
+
+_enabled = False
+_log_json = False
+_lock = threading.Lock()
+_histograms: Dict[str, '_Histogram'] = {}
+_gauges: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+class _Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+
+def configure(enabled: bool, log_json: bool = False):
+    """Liga ou desliga a coleta. Desligada, o custo é um teste booleano."""
+    global _enabled, _log_json
+    _enabled = enabled
+    _log_json = log_json
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def observe(operation: str, seconds: float, **fields):
+    """Registra uma latência já medida para `operation`."""
+    with _lock:
+        histogram = _histograms.get(operation)
+        if histogram is None:
+            histogram = _histograms[operation] = _Histogram()
+        histogram.observe(seconds)
+    if _log_json:
+        logger.info(
+            json.dumps(
+                {'operation': operation, 'seconds': round(seconds, 6), **fields}
+            )
+        )
+
+
+@contextmanager
+def _track(operation: str):
+    start = time.perf_counter()
+    outcome = 'ok'
+    try:
+        yield
+    except BaseException as e:
+        # st.rerun() e st.stop() também saem por exceção.
+        outcome = type(e).__name__
+        raise
+    finally:
+        observe(operation, time.perf_counter() - start, outcome=outcome)
+
+
+def track(operation: str):
+    """Context manager que mede o bloco como `operation`."""
+    if not _enabled:
+        return nullcontext()
+    return _track(operation)
+
+
+def timed(operation: str):
+    """
+    Decorador que mede cada chamada da função como `operation`. Em funções
+    async, mede até o fim da corrotina.
+    """
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await func(*args, **kwargs)
+                with _track(operation):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _track(operation):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def register_gauges(name: str, collect: Callable[[], Dict[str, Any]]):
+    """Registra uma função que devolve valores numéricos a exportar."""
+    with _lock:
+        _gauges[name] = collect
+
+
+def snapshot() -> Dict[str, Any]:
+    """Histogramas e medidores atuais como um dicionário serializável."""
+    with _lock:
+        histograms = {
+            operation: {
+                'count': h.count,
+                'sum': h.total,
+                'buckets': dict(zip([*map(str, BUCKETS), '+Inf'], h.counts)),
+            }
+            for operation, h in _histograms.items()
+        }
+        gauges = dict(_gauges)
+    return {
+        'histograms': histograms,
+        'gauges': {name: collect() for name, collect in gauges.items()},
+    }
+
+
+def _metric_name(name: str) -> str:
+    return ''.join(c if c.isalnum() else '_' for c in name)
+
+
+def prometheus_text() -> str:
+    """Exporta as métricas no formato texto do Prometheus."""
+    data = snapshot()
+    lines = [
+        '# HELP verificalp_operation_seconds Latência por operação.',
+        '# TYPE verificalp_operation_seconds histogram',
+    ]
+    for operation, h in sorted(data['histograms'].items()):
+        cumulative = 0
+        for bound, count in h['buckets'].items():
+            cumulative += count
+            lines.append(
+                f'verificalp_operation_seconds_bucket{{operation="{operation}",'
+                f'le="{bound}"}} {cumulative}'
+            )
+        lines.append(
+            f'verificalp_operation_seconds_sum{{operation="{operation}"}} '
+            f'{h["sum"]}'
+        )
+        lines.append(
+            f'verificalp_operation_seconds_count{{operation="{operation}"}} '
+            f'{h["count"]}'
+        )
+    for name, values in sorted(data['gauges'].items()):
+        for key, value in sorted(_flatten(values).items()):
+            lines.append(
+                f'verificalp_{_metric_name(name)}_{_metric_name(key)} {value}'
+            )
+    return '\n'.join(lines) + '\n'
+
+
+def _flatten(values: Dict[str, Any], prefix: str = '') -> Dict[str, float]:
+    flat = {}
+    for key, value in values.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f'{prefix}{key}_'))
+        elif isinstance(value, (int, float)):
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+
+def start_metrics_server(port: int) -> ThreadingHTTPServer:
+    """Serve /metrics (Prometheus) e /metrics.json em uma thread própria."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                body = prometheus_text().encode()
+                content_type = 'text/plain; version=0.0.4'
+            elif self.path == '/metrics.json':
+                body = json.dumps(snapshot()).encode()
+                content_type = 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('0.0.0.0', port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
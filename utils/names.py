@@ -0,0 +1,16 @@
+from unicodedata import normalize
+
+
+def normalize_name(name: str | None) -> str:
+    """
+    Chave de comparação de nomes: sem acentos, minúscula e sem espaços.
+    É gravada como 'nome_normalizado' na ingestão dos cadastros.
+    """
+    if not name:
+        return ''
+    name = normalize('NFKD', name).encode('ASCII', 'ignore').decode('utf-8')
+    return ''.join(name.lower().split())
+
+
+def verify_names_match(name1: str, name2: str) -> bool:
+    return normalize_name(name1) == normalize_name(name2)
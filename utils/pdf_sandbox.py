@@ -0,0 +1,209 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from io import BytesIO
+from typing import Any, Dict
+
+import streamlit as st
+
+from utils.metrics import timed
+
+PDF_JOB_TIMEOUT_SECONDS = 5.0
+PDF_WORKER_START_TIMEOUT_SECONDS = 30.0
+PDF_WORKER_MEMORY_MB = 512
+PDF_WORKERS = 2
+PDF_JOBS_PER_WORKER = 50
+
+_context = multiprocessing.get_context('spawn')
+
+
+class PdfSandboxError(Exception):
+    """O processo que analisava o PDF estourou o tempo, a memória ou caiu."""
+
+
+class _Killed(Exception):
+    pass
+
+
+def _limit_memory(limit_mb: int):
+    """Limita o espaço de endereçamento do processo atual ao uso atual
+    acrescido de `limit_mb`. Sem efeito fora do Linux."""
+    try:
+        import resource
+
+        with open('/proc/self/statm') as f:
+            current = int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+        limit = current + limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, OSError, ValueError):
+        pass
+
+
+def _worker_main(conn, memory_limit_mb: int):
+    from utils.enem import extract_hash_from_pdf
+
+    _limit_memory(memory_limit_mb)
+    conn.send(('ready', None))
+    while True:
+        try:
+            data = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send(('ok', extract_hash_from_pdf(BytesIO(data))))
+        except MemoryError:
+            conn.send(('memory', None))
+            return
+
+
+class _Worker:
+    def __init__(self, memory_limit_mb: int):
+        self.conn, child_conn = _context.Pipe()
+        self.process = _context.Process(
+            target=_worker_main,
+            args=(child_conn, memory_limit_mb),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def wait_ready(self, timeout: float):
+        """Espera o processo terminar os imports; não conta no tempo do
+        trabalho."""
+        try:
+            if self.conn.poll(timeout) and self.conn.recv()[0] == 'ready':
+                return
+        except (EOFError, OSError):
+            pass
+        self.kill()
+        raise _Killed('start')
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        self.conn.close()
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.kill()
+
+
+class PdfSandboxPool:
+    """
+    Pool de processos que analisa PDFs fora da thread do Streamlit.
+
+    Cada trabalho tem um tempo máximo de relógio, contado depois que o
+    processo terminou de iniciar; se estourar, o processo é morto e
+    substituído. Os processos têm memória limitada e são
+    reciclados após `max_jobs_per_worker` trabalhos.
+    """
+
+    def __init__(
+        self,
+        workers: int = PDF_WORKERS,
+        timeout: float = PDF_JOB_TIMEOUT_SECONDS,
+        start_timeout: float = PDF_WORKER_START_TIMEOUT_SECONDS,
+        memory_limit_mb: int = PDF_WORKER_MEMORY_MB,
+        max_jobs_per_worker: int = PDF_JOBS_PER_WORKER,
+    ):
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._idle = queue.Queue()
+        for _ in range(workers):
+            self._idle.put(None)  # Processos são criados sob demanda.
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._counters = Counter()
+        self._latencies = deque(maxlen=500)
+
+    @timed('pdf.extract_hash')
+    def extract_hash(self, data: bytes) -> str | None:
+        """Extrai o token do ENEM em um processo isolado."""
+        start = time.perf_counter()
+        with self._lock:
+            self._waiting += 1
+        worker = self._idle.get()
+        with self._lock:
+            self._waiting -= 1
+        try:
+            if worker is None:
+                worker = _Worker(self.memory_limit_mb)
+                worker.wait_ready(self.start_timeout)
+            result = self._run(worker, data)
+        except _Killed as e:
+            self._idle.put(None)
+            self._count(str(e))
+            raise PdfSandboxError(str(e)) from None
+        except BaseException:
+            # O processo pode estar no meio de um trabalho cuja resposta
+            # ninguém vai ler.
+            if worker is not None:
+                worker.kill()
+            self._idle.put(None)
+            raise
+        finally:
+            with self._lock:
+                self._latencies.append(time.perf_counter() - start)
+        worker.jobs += 1
+        if worker.jobs >= self.max_jobs_per_worker:
+            worker.stop()
+            worker = None
+            self._count('recycled')
+        self._idle.put(worker)
+        self._count('ok')
+        return result
+
+    def _run(self, worker: _Worker, data: bytes) -> str | None:
+        try:
+            worker.conn.send(data)
+            if not worker.conn.poll(self.timeout):
+                worker.kill()
+                raise _Killed('timeout')
+            status, result = worker.conn.recv()
+            if status != 'ok':
+                worker.kill()
+                raise _Killed(status)
+            return result
+        except (EOFError, OSError):
+            worker.kill()
+            raise _Killed('crash')
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Fila, contadores e latência (em ms) dos trabalhos recentes."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                'queue_depth': self._waiting,
+                'idle_workers': self._idle.qsize(),
+                **self._counters,
+            }
+        if latencies:
+            stats['latency_p50_ms'] = latencies[len(latencies) // 2] * 1000
+            stats['latency_p95_ms'] = (
+                latencies[int(len(latencies) * 0.95)] * 1000
+            )
+        return stats
+
+    def close(self):
+        while not self._idle.empty():
+            worker = self._idle.get_nowait()
+            if worker:
+                worker.stop()
+
+
+@st.cache_resource
+def get_pdf_sandbox() -> PdfSandboxPool:
+    """Pool compartilhado por todas as sessões do processo."""
+    return PdfSandboxPool()
@@ -0,0 +1,107 @@
+import sys
+import threading
+import weakref
+from typing import Any, Dict, Mapping
+
+from utils.enem import parse_relevant_scores
+
+_lock = threading.Lock()
+_records: 'weakref.WeakSet[EnemSession]' = weakref.WeakSet()
+
+
+class EnemSession:
+    """
+    O que a sessão guarda do ENEM entre a validação e a confirmação: o
+    token, o nome, as notas já extraídas e a escolha anterior, se houver.
+    O JSON completo do INEP e o documento da inscrição são descartados.
+    """
+
+    __slots__ = (
+        'token',
+        'nome',
+        'scores',
+        'turma_anterior',
+        'escolha_anterior',
+        '__weakref__',
+    )
+
+    def __init__(
+        self,
+        token: str,
+        nome: str,
+        scores: Dict[str, Any],
+        turma_anterior: str | None = None,
+        escolha_anterior: str | None = None,
+    ):
+        self.token = token
+        self.nome = nome
+        self.scores = scores
+        self.turma_anterior = turma_anterior
+        self.escolha_anterior = escolha_anterior
+        with _lock:
+            _records.add(self)
+
+    @classmethod
+    def from_validation(
+        cls,
+        enem_data: Dict[str, Any],
+        existing_enrollment: Dict[str, Any] | None = None,
+    ) -> 'EnemSession':
+        existing = existing_enrollment or {}
+        return cls(
+            token=enem_data.get('hash'),
+            nome=enem_data.get('nome', ''),
+            scores=parse_relevant_scores(enem_data),
+            turma_anterior=existing.get('turma_escolhida'),
+            escolha_anterior=existing.get('escolha'),
+        )
+
+    @property
+    def is_update(self) -> bool:
+        return self.turma_anterior is not None
+
+
+def deep_sizeof(obj: Any, seen: set[int] | None = None) -> int:
+    """
+    Bytes ocupados por `obj` e tudo o que ele referencia (dicionários,
+    listas, tuplas, conjuntos e atributos de __slots__ ou __dict__).
+    Objetos compartilhados são contados uma vez.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, Mapping):
+        for key, value in obj.items():
+            size += deep_sizeof(key, seen) + deep_sizeof(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += deep_sizeof(item, seen)
+    for slot in getattr(type(obj), '__slots__', ()):
+        if slot != '__weakref__' and hasattr(obj, slot):
+            size += deep_sizeof(getattr(obj, slot), seen)
+    if hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+def session_footprint(state: Mapping[str, Any]) -> Dict[str, int]:
+    """Bytes por chave de um session_state, mais o total em 'total'."""
+    footprint = {key: deep_sizeof(value) for key, value in state.items()}
+    footprint['total'] = sum(footprint.values())
+    return footprint
+
+
+def session_stats() -> Dict[str, Any]:
+    """Registros de ENEM vivos no processo e quanto ocupam."""
+    with _lock:
+        records = list(_records)
+    total = sum(deep_sizeof(record) for record in records)
+    return {
+        'records': len(records),
+        'bytes': total,
+        'bytes_per_record': total / len(records) if records else 0,
+    }
@@ -1,9 +1,44 @@
 import base64
+import hashlib
+import re
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 
 import streamlit as st
 
+STATIC_DIR = Path(__file__).resolve().parent.parent / 'static'
+STATIC_URL_PREFIX = 'app/static'
 
+
+@dataclass(frozen=True)
+class StaticAsset:
+    data: bytes
+    fingerprint: str
+
+
+@lru_cache(maxsize=32)
+def load_static_asset(name: str) -> StaticAsset | None:
+    """Lê um arquivo de static/ uma única vez por processo."""
+    try:
+        data = (STATIC_DIR / name).read_bytes()
+    except FileNotFoundError:
+        return None
+    return StaticAsset(data, hashlib.sha256(data).hexdigest()[:12])
+
+
+def static_url(name: str) -> str | None:
+    """
+    URL de um arquivo de static/ servido pelo próprio Streamlit. A versão no
+    query string faz o navegador guardá-lo em cache por tempo indeterminado.
+    """
+    asset = load_static_asset(name)
+    if asset is None:
+        return None
+    return f'{STATIC_URL_PREFIX}/{name}?v={asset.fingerprint}'
+
+
+@lru_cache(maxsize=32)
 def load_image_as_base64(image_path: str) -> str | None:
     """Carrega uma imagem local e a converte para base64 para embutir no app."""
     try:
@@ -14,14 +49,37 @@ def load_image_as_base64(image_path: str) -> str | None:
         return None
 
 
+def image_src(name: str) -> str | None:
+    """
+    Endereço para usar em <img src>: a URL estática quando o servidor
+    serve static/, ou um data URI como alternativa.
+    """
+    if st.get_option('server.enableStaticServing'):
+        return static_url(name)
+    logo_base64 = load_image_as_base64(str(STATIC_DIR / name))
+    if logo_base64:
+        return f'data:image/png;base64,{logo_base64}'
+    return None
+
+
 def load_css():
     """
     Carrega e injeta um CSS customizado que se adapta automaticamente
     aos temas claro e escuro do Streamlit.
     """
-    st.markdown(
-        """
-    <style>
+    st.markdown(_minified_css(), unsafe_allow_html=True)
+
+
+@lru_cache(maxsize=1)
+def _minified_css() -> str:
+    """CSS sem comentários e espaços, calculado uma vez por processo."""
+    css = re.sub(r'/\*.*?\*/', '', CSS, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};:,>])\s*', r'\1', css)
+    return f'<style>{css.strip()}</style>'
+
+
+CSS = """
         /* Remove a barra superior do Streamlit */
         header {visibility: hidden;}
 
@@ -81,7 +139,4 @@ def load_css():
             max-width: 150px; height: 150px;
             filter: none !important; /* Impede que o tema escuro inverta as cores da logo */
         }
-    </style>
-    """,
-        unsafe_allow_html=True,
-    )
+"""